@@ -0,0 +1,119 @@
+"""initial schema
+
+Revision ID: 1a4c7e2b9d05
+Revises:
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision: str = '1a4c7e2b9d05'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'users',
+        sa.Column('first_name', sa.String(length=30), nullable=False),
+        sa.Column('last_name', sa.String(length=30), nullable=False),
+        sa.Column('email', sa.String(length=50), nullable=False),
+        sa.Column('phone', sa.String(length=20), nullable=True),
+        sa.Column('avatar', sa.String(), nullable=True),
+        sa.Column(
+            'role',
+            sa.Enum('customer', 'admin', name='userrole'),
+            nullable=False,
+        ),
+        sa.Column('is_suspended', sa.Boolean(), nullable=True),
+        sa.Column('otp', sa.String(length=6), nullable=True),
+        sa.Column(
+            'otp_expires_at', sa.DateTime(timezone=True), nullable=True
+        ),
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_index('ix_users_email', 'users', ['email'], unique=True)
+    op.create_table(
+        'products',
+        sa.Column('title', sa.String(length=100), nullable=False),
+        sa.Column('description', sa.String(), nullable=False),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('discount_price', sa.Float(), nullable=True),
+        sa.Column('image', sa.String(), nullable=False),
+        sa.Column('rating', sa.Float(), nullable=False),
+        sa.Column('category', sa.String(length=50), nullable=True),
+        sa.Column('featured', sa.Boolean(), nullable=True),
+        sa.Column('specs', sa.ARRAY(sa.String()), nullable=True),
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'auth_sessions',
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('access_token', sa.String(length=500), nullable=False),
+        sa.Column('refresh_token', sa.String(length=500), nullable=False),
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'orders',
+        sa.Column('user_id', sa.String(), nullable=False),
+        sa.Column('total', sa.Float(), nullable=False),
+        sa.Column(
+            'status',
+            sa.Enum(
+                'processing',
+                'shipped',
+                'delivered',
+                'cancelled',
+                name='orderstatus',
+            ),
+            nullable=False,
+        ),
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+    op.create_table(
+        'order_items',
+        sa.Column('order_id', sa.String(), nullable=False),
+        sa.Column('product_id', sa.String(), nullable=False),
+        sa.Column('title', sa.String(length=100), nullable=False),
+        sa.Column('price', sa.Float(), nullable=False),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('image', sa.String(), nullable=False),
+        sa.Column('id', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.ForeignKeyConstraint(['order_id'], ['orders.id']),
+        sa.ForeignKeyConstraint(['product_id'], ['products.id']),
+        sa.PrimaryKeyConstraint('id'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('order_items')
+    op.drop_table('orders')
+    op.drop_table('auth_sessions')
+    op.drop_table('products')
+    op.drop_index('ix_users_email', table_name='users')
+    op.drop_table('users')
+    sa.Enum(name='orderstatus').drop(op.get_bind(), checkfirst=False)
+    sa.Enum(name='userrole').drop(op.get_bind(), checkfirst=False)
@@ -0,0 +1,100 @@
+"""hash auth session tokens
+
+Revision ID: 5d2a9e41c7f3
+Revises: 8b1e6d0c52a7
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2a9e41c7f3'
+down_revision: Union[str, None] = '8b1e6d0c52a7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TOKENS = ['access_token', 'refresh_token']
+
+
+def _drop_invalid_index(name: str) -> None:
+    """Drop an index a failed CREATE INDEX CONCURRENTLY left INVALID"""
+    invalid = op.get_bind().execute(
+        sa.text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ),
+        {'name': name},
+    ).scalar()
+    if invalid:
+        op.drop_index(
+            name, table_name='auth_sessions', postgresql_concurrently=True
+        )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for token in TOKENS:
+        # The autocommit block below commits these columns, so a run that
+        # fails while indexing must be able to start over
+        op.execute(
+            f"ALTER TABLE auth_sessions "
+            f"ADD COLUMN IF NOT EXISTS {token}_hash VARCHAR(64)"
+        )
+        # Same digest as app.core.security.revocation.token_digest
+        op.execute(
+            f"UPDATE auth_sessions SET {token}_hash = "
+            f"encode(sha256(convert_to({token}, 'UTF8')), 'hex')"
+        )
+        # Tokens issued before they carried a jti are identical when a
+        # user signed in twice within a second; keep the newest session
+        op.execute(
+            f"DELETE FROM auth_sessions WHERE id IN ("
+            f"SELECT id FROM (SELECT id, row_number() OVER ("
+            f"PARTITION BY {token}_hash "
+            f"ORDER BY created_at DESC NULLS LAST, id DESC) AS rank "
+            f"FROM auth_sessions) ranked WHERE rank > 1)"
+        )
+        op.alter_column('auth_sessions', f'{token}_hash', nullable=False)
+
+    # CREATE/DROP INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for token in TOKENS:
+            _drop_invalid_index(f'ix_auth_sessions_{token}_hash')
+            op.create_index(
+                f'ix_auth_sessions_{token}_hash',
+                'auth_sessions',
+                [f'{token}_hash'],
+                unique=True,
+                if_not_exists=True,
+                postgresql_concurrently=True,
+            )
+            op.drop_index(
+                f'ix_auth_sessions_{token}',
+                table_name='auth_sessions',
+                if_exists=True,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for token in reversed(TOKENS):
+            op.create_index(
+                f'ix_auth_sessions_{token}',
+                'auth_sessions',
+                [token],
+                unique=False,
+                postgresql_concurrently=True,
+            )
+            op.drop_index(
+                f'ix_auth_sessions_{token}_hash',
+                table_name='auth_sessions',
+                postgresql_concurrently=True,
+            )
+
+    for token in reversed(TOKENS):
+        op.drop_column('auth_sessions', f'{token}_hash')
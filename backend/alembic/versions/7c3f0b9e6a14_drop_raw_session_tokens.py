@@ -0,0 +1,67 @@
+"""drop raw session tokens
+
+Revision ID: 7c3f0b9e6a14
+Revises: e2b8f5a3c19d
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3f0b9e6a14'
+down_revision: Union[str, None] = 'e2b8f5a3c19d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TOKENS = ['access_token', 'refresh_token']
+
+
+def _jwt_exp(column: str) -> str:
+    """SQL reading the exp claim out of a JWT's base64url payload"""
+    payload = f"split_part({column}, '.', 2)"
+    padded = (
+        f"rpad(translate({payload}, '-_', '+/'), "
+        f"(length({payload}) + 3) / 4 * 4, '=')"
+    )
+    return (
+        f"to_timestamp((convert_from(decode({padded}, 'base64'), 'UTF8')"
+        f"::json ->> 'exp')::double precision)"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Sessions are found by digest; revocation only needs each token's
+    # expiry, so the bearer tokens themselves are no longer stored
+    for token in TOKENS:
+        op.add_column(
+            'auth_sessions',
+            sa.Column(
+                f'{token}_expires_at',
+                sa.DateTime(timezone=True),
+                nullable=True,
+            ),
+        )
+        op.execute(
+            f"UPDATE auth_sessions SET {token}_expires_at = {_jwt_exp(token)}"
+        )
+        op.alter_column(
+            'auth_sessions', f'{token}_expires_at', nullable=False
+        )
+        op.drop_column('auth_sessions', token)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # The tokens cannot be recovered from their digests, so every session
+    # is signed out
+    op.execute("DELETE FROM auth_sessions")
+    for token in reversed(TOKENS):
+        op.add_column(
+            'auth_sessions',
+            sa.Column(token, sa.String(length=500), nullable=False),
+        )
+        op.drop_column('auth_sessions', f'{token}_expires_at')
@@ -0,0 +1,72 @@
+"""add query shape indexes
+
+Revision ID: 8b1e6d0c52a7
+Revises: 3f9c2a7d41b8
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '8b1e6d0c52a7'
+down_revision: Union[str, None] = '3f9c2a7d41b8'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index, table, columns) matching the filter + "ORDER BY <sort>, id"
+# shapes generated by BaseModel.get_all and the token lookups
+INDEXES = [
+    ('ix_products_created_at_id', 'products', ['created_at', 'id']),
+    (
+        'ix_products_category_created_at',
+        'products',
+        ['category', 'created_at', 'id'],
+    ),
+    (
+        'ix_products_featured_created_at',
+        'products',
+        ['featured', 'created_at', 'id'],
+    ),
+    ('ix_products_price_id', 'products', ['price', 'id']),
+    ('ix_products_rating_id', 'products', ['rating', 'id']),
+    (
+        'ix_orders_user_id_created_at',
+        'orders',
+        ['user_id', 'created_at', 'id'],
+    ),
+    (
+        'ix_orders_status_created_at',
+        'orders',
+        ['status', 'created_at', 'id'],
+    ),
+    ('ix_orders_created_at_id', 'orders', ['created_at', 'id']),
+    ('ix_order_items_order_id', 'order_items', ['order_id']),
+    ('ix_auth_sessions_access_token', 'auth_sessions', ['access_token']),
+    ('ix_auth_sessions_refresh_token', 'auth_sessions', ['refresh_token']),
+    ('ix_auth_sessions_user_id', 'auth_sessions', ['user_id']),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(
+                name,
+                table,
+                columns,
+                unique=False,
+                postgresql_concurrently=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(
+                name, table_name=table, postgresql_concurrently=True
+            )
@@ -0,0 +1,53 @@
+"""add reaper indexes
+
+Revision ID: c4e7a1f9d2b6
+Revises: 5d2a9e41c7f3
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4e7a1f9d2b6'
+down_revision: Union[str, None] = '5d2a9e41c7f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_auth_sessions_updated_at',
+            'auth_sessions',
+            ['updated_at'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+        op.create_index(
+            'ix_users_otp_expires_at',
+            'users',
+            ['otp_expires_at'],
+            unique=False,
+            postgresql_where=sa.text('otp_expires_at IS NOT NULL'),
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_users_otp_expires_at',
+            table_name='users',
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_auth_sessions_updated_at',
+            table_name='auth_sessions',
+            postgresql_concurrently=True,
+        )
@@ -0,0 +1,52 @@
+"""move otp state to redis
+
+Revision ID: e2b8f5a3c19d
+Revises: c4e7a1f9d2b6
+Create Date: 2026-10-18 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b8f5a3c19d'
+down_revision: Union[str, None] = 'c4e7a1f9d2b6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Pending codes now live in Redis; any left in the table are dropped
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_users_otp_expires_at',
+            table_name='users',
+            postgresql_concurrently=True,
+        )
+    op.drop_column('users', 'otp_expires_at')
+    op.drop_column('users', 'otp')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.add_column(
+        'users', sa.Column('otp', sa.String(length=6), nullable=True)
+    )
+    op.add_column(
+        'users',
+        sa.Column(
+            'otp_expires_at', sa.DateTime(timezone=True), nullable=True
+        ),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_otp_expires_at',
+            'users',
+            ['otp_expires_at'],
+            unique=False,
+            postgresql_where=sa.text('otp_expires_at IS NOT NULL'),
+            postgresql_concurrently=True,
+        )
@@ -1,23 +1,83 @@
+import asyncio
 from contextlib import asynccontextmanager
+from typing import Any
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from redis.exceptions import RedisError
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from uvicorn.middleware.proxy_headers import ProxyHeadersMiddleware
 
 from app.api import api_router
 from app.core.config import settings
-from app.core.redis import redis_client
+from app.core.database import (
+    engine,
+    pool_stats,
+    replica_engines,
+    warm_up_pool,
+)
+from app.core.logging import logger
+from app.core.middleware import get_admin, permission_cache
+from app.core.ratelimit import RateLimitMiddleware, rate_limiter
+from app.core.reaper import reap_expired
+from app.core.redis import (
+    enqueue_periodically,
+    maintenance_queue,
+    redis_client,
+)
+from app.core.responses import FastJSONResponse
+from app.core.security.jwt import AUTH_LOAD
+from app.models.auth import Auth
+from app.models.product import Product
+from app.models.user import User
+
+
+async def _warm_auth_lookup(db: AsyncSession) -> None:
+    await Auth.get(db, AUTH_LOAD, access_token_hash="")
+
+
+async def _warm_product_lookup(db: AsyncSession) -> None:
+    await Product.get(db, id="")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    # Start Redis connection when app starts
-    # Redis client is already initialized in the redis.py file
+    # Fail fast on rate limits configured for routes that do not exist
+    rate_limiter.bind(app.router.routes)
+
+    # Open the first pooled Redis connection when app starts
+    try:
+        await redis_client.ping()
+    except RedisError as e:
+        logger.warning(f"Redis unavailable at startup: {e}")
+
+    # Pre-open database connections and prepare the per-request statements
+    try:
+        await warm_up_pool(
+            settings.DB_POOL_WARMUP,
+            [_warm_auth_lookup, _warm_product_lookup],
+        )
+    except (SQLAlchemyError, OSError) as e:
+        logger.warning(f"Database pool warm-up failed: {e}")
+
+    # Schedule the reaper for expired sessions
+    reaper = asyncio.create_task(
+        enqueue_periodically(
+            maintenance_queue, reap_expired, settings.REAPER_INTERVAL_SECONDS
+        )
+    )
+
     try:
         # You can add any startup logic here
         yield
     finally:
-        # Close Redis connection when app shuts down
-        redis_client.close()
+        reaper.cancel()
+        # Release pooled Redis and database connections when app shuts down
+        await redis_client.aclose()
+        await engine.dispose()
+        for replica in replica_engines:
+            await replica.dispose()
 
 
 app = FastAPI(
@@ -26,8 +86,11 @@ app = FastAPI(
     description=f"{settings.APP_NAME} API",
     openapi_url="/openapi.json" if settings.is_development else None,
     lifespan=lifespan,
+    default_response_class=FastJSONResponse,
 )
 
+# Added before CORS so rejected requests still carry CORS headers
+app.add_middleware(RateLimitMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=settings.ALLOWED_ORIGINS,
@@ -35,12 +98,16 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+# Outermost, so every layer sees the client behind a trusted proxy
+app.add_middleware(
+    ProxyHeadersMiddleware, trusted_hosts=settings.FORWARDED_ALLOW_IPS
+)
 
 app.include_router(api_router)
 
 
 @app.get("/", tags=["Health Check"])
-async def health_check() -> dict[str, str]:
+async def health_check() -> dict[str, Any]:
     """Health check endpoint to verify API status"""
     return {
         "app_name": settings.APP_NAME,
@@ -48,3 +115,13 @@ async def health_check() -> dict[str, str]:
         "environment": settings.ENVIRONMENT,
         "status": "healthy",
     }
+
+
+@app.get("/metrics", tags=["Health Check"])
+async def metrics(_: User = Depends(get_admin)) -> dict[str, Any]:
+    """Connection pool, rate limit and cache statistics (admin only)"""
+    return {
+        "database_pool": pool_stats(),
+        "rate_limit": rate_limiter.stats(),
+        "permission_cache": permission_cache.stats(),
+    }
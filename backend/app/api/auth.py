@@ -1,11 +1,17 @@
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi.security import HTTPAuthorizationCredentials
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.core.middleware import security, get_user, sync_user, assign_role
+from app.core.database import get_db, get_read_db, get_uow_db, unit_of_work
+from app.core.middleware import (
+    security,
+    get_read_user,
+    sync_user,
+    assign_role,
+)
+from app.core.security import otp
 from app.core.security.jwt import (
     generate_tokens,
     regenerate_tokens,
@@ -35,12 +41,16 @@ async def register(
                 detail="An account with this email address already exists. Please use a different email or try to sign in.",
             )
 
+        # The account is only committed once Permit has the user and role,
+        # so a failed sync leaves no half-registered user behind
         user = User(**user_data.model_dump())
-        await user.send_otp(db, is_new=True)
-        await sync_user(user)
-        await assign_role(user.id, user.role.value)
+        async with unit_of_work(db):
+            await user.save(db)
+            await sync_user(user)
+            await assign_role(user.id, user.role.value)
+        await user.send_otp(is_new=True)
 
-        return UserResponse(**user.model_dump())
+        return UserResponse.from_row(user)
     except HTTPException as http_err:
         raise http_err
     except Exception as e:
@@ -49,10 +59,21 @@ async def register(
 
 @router.post("/request-otp")
 async def request_otp(
-    data: RequestOTP, db: AsyncSession = Depends(get_db)
+    data: RequestOTP,
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
 ) -> dict[str, str]:
     """Request a new OTP for authentication"""
     try:
+        ip = request.client.host if request.client else None
+        retry_after = await otp.throttle(data.email, ip)
+        if retry_after is not None:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many verification codes requested. Please wait before trying again.",
+                headers={"Retry-After": str(retry_after)},
+            )
+
         user = await User.get(db, email=data.email)
         if not user:
             raise HTTPException(
@@ -60,7 +81,7 @@ async def request_otp(
                 detail="No account found with this email address. Please check the email or register a new account.",
             )
 
-        await user.send_otp(db)
+        await user.send_otp()
         return {"message": "Verification code sent successfully"}
     except HTTPException as http_err:
         raise http_err
@@ -70,20 +91,21 @@ async def request_otp(
 
 @router.post("/verify-otp")
 async def verify_otp(
-    data: VerifyOTP, db: AsyncSession = Depends(get_db)
+    data: VerifyOTP, db: AsyncSession = Depends(get_uow_db)
 ) -> AuthResponse:
     """Verify OTP and authenticate user"""
     try:
-        user = await User.get(db, email=data.email)
-        if not user:
-            raise HTTPException(status_code=404, detail="User not found")
-
-        if not await user.verify_otp(db, data.otp):
+        # Codes live in Redis, so wrong guesses never reach the database
+        if not await otp.verify(data.email, data.otp):
             raise HTTPException(
                 status_code=401,
                 detail="The verification code you entered is incorrect or has expired. Please try again or request a new code.",
             )
 
+        user = await User.get(db, email=data.email)
+        if not user:
+            raise HTTPException(status_code=404, detail="User not found")
+
         if user.is_suspended:
             raise HTTPException(
                 status_code=401,
@@ -99,11 +121,11 @@ async def verify_otp(
 
 @router.get("/me")
 async def get_current_user(
-    user: User = Depends(get_user),
+    user: User = Depends(get_read_user),
 ) -> UserResponse:
     """Get current authenticated user"""
     try:
-        return UserResponse(**user.model_dump())
+        return UserResponse.from_row(user)
     except HTTPException as http_err:
         raise http_err
     except Exception as e:
@@ -1,8 +1,10 @@
 from typing import Annotated, Any, List
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.core.database import get_db
+from app.core.database import commit, get_db, get_read_db
 from app.core.middleware import has_permission
+from app.core.responses import FastJSONResponse
+from app.models import COUNT_WINDOW, JOINED, SELECTIN, LoadPlan
 from app.models.order import Order, OrderItem, OrderStatus
 from app.models.product import Product
 from app.models.user import User
@@ -15,6 +17,10 @@ from app.schemas.order import (
 
 router = APIRouter(prefix="/orders", tags=["orders"])
 
+# Relationships each endpoint serializes; anything else raises if touched
+ORDER_LIST_LOAD: LoadPlan = {"items": SELECTIN}
+ORDER_DETAIL_LOAD: LoadPlan = {"items": JOINED}
+
 
 @router.post("/", response_model=OrderResponse)
 async def create_order(
@@ -24,11 +30,18 @@ async def create_order(
 ) -> OrderResponse:
     """Create a new order for the current user"""
     try:
+        products = {
+            product.id: product
+            for product in await Product.get_many(
+                db, (item.product_id for item in order_data.items)
+            )
+        }
+
         total = 0
-        order_items: List[dict[str, Any]] = []
+        order_items: List[OrderItem] = []
 
         for item_data in order_data.items:
-            product = await Product.get(db, id=item_data.product_id)
+            product = products.get(item_data.product_id)
             if not product:
                 raise HTTPException(
                     status_code=404,
@@ -44,29 +57,24 @@ async def create_order(
             total += item_total
 
             order_items.append(
-                {
-                    "product_id": product.id,
-                    "title": product.title,
-                    "price": price,
-                    "quantity": item_data.quantity,
-                    "image": product.image,
-                }
+                OrderItem(
+                    product_id=product.id,
+                    title=product.title,
+                    price=price,
+                    quantity=item_data.quantity,
+                    image=product.image,
+                )
             )
 
-        order = Order(user_id=user.id, total=total)
-        await order.save(db)
-
-        for item_data in order_items:
-            order_item = OrderItem(order_id=order.id, **item_data)
-            await order_item.save(db)
+        # Order and items are flushed together in one transaction, the
+        # items as a single multi-row insert
+        order = Order(user_id=user.id, total=total, items=order_items)
+        db.add(order)
+        await commit(db)
 
-        order = await Order.get(db, id=order.id, load_relationships=True)
-        if not order:
-            raise HTTPException(
-                status_code=500, detail="Order not found after creation"
-            )
-
-        return OrderResponse(**order.model_dump(True))
+        return OrderResponse.from_row(order)
+    except HTTPException as http_err:
+        raise http_err
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -74,9 +82,9 @@ async def create_order(
 @router.get("/", response_model=PaginatedResponse[OrderResponse])
 async def list_orders(
     request: Annotated[OrderPaginatedRequest, Depends()],
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     user: User = Depends(has_permission("read", "order")),
-) -> PaginatedResponse[OrderResponse]:
+) -> Response:
     """List orders with filtering and pagination"""
     try:
         filters: dict[str, Any] = {}
@@ -84,9 +92,7 @@ async def list_orders(
         if user.role.value != "admin":  # Replace with permit way
             filters["user_id"] = user.id
 
-        if request.status is not None:
-            filters["status"] = "Shipped"
-
+        response = OrderResponse.partial(request.fields)
         orders, total = await Order.get_all(
             db,
             page=request.page,
@@ -95,15 +101,27 @@ async def list_orders(
             descending=request.descending,
             filters=filters,
             search=request.search,
-            load_relationships=True
+            cursor=request.cursor,
+            predicates=request.predicates(),
+            count=COUNT_WINDOW,
+            load=ORDER_LIST_LOAD if "items" in response.model_fields else None,
+            columns=response.model_fields.keys() if request.fields else None,
         )
 
-        return PaginatedResponse(
-            data=[OrderResponse(**o.model_dump(True)) for o in orders],
+        page = PaginatedResponse[response](  # type: ignore
+            data=[response.from_row(o) for o in orders],
             total=total,
             page=request.page,
             pages=(total + request.size - 1) // request.size,
+            next_cursor=(
+                orders[-1].cursor(request.sort_by, request.descending)
+                if len(orders) == request.size
+                else None
+            ),
         )
+        # Rendered from the model in one pass, skipping FastAPI's
+        # response validation and serialization
+        return FastJSONResponse(page)
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
@@ -113,7 +131,7 @@ async def list_orders(
 @router.get("/{order_id}", response_model=OrderResponse)
 async def get_order(
     order_id: str,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     user: User = Depends(has_permission("read", "order")),
 ) -> OrderResponse:
     """Get an order by ID (users can only access their own orders, admins can access any)"""
@@ -123,11 +141,11 @@ async def get_order(
     if user.role.value != "admin":
         filters["user_id"] = user.id
 
-    order = await Order.get(db, True, **filters)
+    order = await Order.get(db, ORDER_DETAIL_LOAD, **filters)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
-    return OrderResponse(**order.model_dump(True))
+    return OrderResponse.from_row(order)
 
 
 @router.patch("/{order_id}/cancel")
@@ -143,7 +161,7 @@ async def cancel_order(
     if user.role.value != "admin":
         filters["user_id"] = user.id
 
-    order = await Order.get(db, True, **filters)
+    order = await Order.get(db, **filters)
     if not order:
         raise HTTPException(status_code=404, detail="Order not found")
 
@@ -1,10 +1,18 @@
-from typing import Annotated, Any, List
+from typing import Annotated, Any, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
+from app.core.cache import (
+    etag_response,
+    get_cached_response,
+    invalidate_tags,
+    response_cache_key,
+    set_cached_response,
+)
+from app.core.database import get_db, get_read_db, on_replica
 from app.core.middleware import has_permission
+from app.models import COUNT_WINDOW
 from app.models.product import Product
 from app.models.user import User
 from app.schemas import PaginatedResponse
@@ -17,6 +25,13 @@ from app.schemas.product import (
 
 router = APIRouter(prefix="/products", tags=["products"])
 
+# Response cache tags: every list page, and each product's detail page
+LIST_TAG = "products"
+
+
+def product_tag(product_id: str) -> str:
+    return f"product:{product_id}"
+
 
 @router.post("/", response_model=ProductResponse)
 async def create_product(
@@ -28,7 +43,8 @@ async def create_product(
     try:
         product = Product(**product_data.model_dump())
         await product.save(db)
-        return ProductResponse(**product.model_dump())
+        await invalidate_tags(LIST_TAG)
+        return ProductResponse.from_row(product)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -36,10 +52,17 @@ async def create_product(
 @router.get("/", response_model=PaginatedResponse[ProductResponse])
 async def list_products(
     request: Annotated[ProductPaginatedRequest, Depends()],
-    db: AsyncSession = Depends(get_db),
-) -> PaginatedResponse[ProductResponse]:
+    db: AsyncSession = Depends(get_read_db),
+    if_none_match: Optional[str] = Header(None),
+) -> Response:
     """List products with filtering and pagination"""
     try:
+        key = response_cache_key("products:list", request.model_dump())
+        cached, versions = await get_cached_response(key, [LIST_TAG])
+        if cached:
+            return etag_response(*cached, if_none_match)
+
+        response = ProductResponse.partial(request.fields)
         filters: dict[str, Any] = {}
         if request.category:
             filters["category"] = request.category
@@ -55,38 +78,29 @@ async def list_products(
             use_or=request.use_or,
             filters=filters,
             search=request.search,
+            cursor=request.cursor,
+            predicates=request.predicates(),
+            count=COUNT_WINDOW,
+            cache_total=True,
+            columns=response.model_fields.keys() if request.fields else None,
         )
 
-        if (
-            request.min_price is not None
-            or request.max_price is not None
-            or request.min_rating is not None
-        ):
-            filtered_products: List[Product] = []
-            for product in products:
-                if (
-                    (
-                        request.min_price is None
-                        or product.price >= request.min_price
-                    )
-                    and (
-                        request.max_price is None
-                        or product.price <= request.max_price
-                    )
-                    and (
-                        request.min_rating is None
-                        or product.rating >= request.min_rating
-                    )
-                ):
-                    filtered_products.append(product)
-            products = filtered_products
-
-        return PaginatedResponse(
-            data=[ProductResponse(**p.model_dump()) for p in products],
+        body = PaginatedResponse[response](  # type: ignore
+            data=[response.from_row(p) for p in products],
             total=total,
             page=request.page,
             pages=(total + request.size - 1) // request.size,
+            next_cursor=(
+                products[-1].cursor(request.sort_by, request.descending)
+                if len(products) == request.size
+                else None
+            ),
+        ).model_dump_json().encode()
+
+        etag = await set_cached_response(
+            key, body, [LIST_TAG], versions, on_replica(db)
         )
+        return etag_response(body, etag, if_none_match)
     except ValueError as ve:
         raise HTTPException(status_code=400, detail=str(ve))
     except Exception as e:
@@ -95,13 +109,36 @@ async def list_products(
 
 @router.get("/{product_id}", response_model=ProductResponse)
 async def get_product(
-    product_id: str, db: AsyncSession = Depends(get_db)
-) -> ProductResponse:
+    product_id: str,
+    db: AsyncSession = Depends(get_read_db),
+    fields: Optional[str] = None,
+    if_none_match: Optional[str] = Header(None),
+) -> Response:
     """Get a product by ID"""
-    product = await Product.get(db, id=product_id)
+    key = response_cache_key("products:detail", [product_id, fields])
+    tags = [product_tag(product_id)]
+    cached, versions = await get_cached_response(key, tags)
+    if cached:
+        return etag_response(*cached, if_none_match)
+
+    try:
+        response = ProductResponse.partial(fields)
+    except ValueError as ve:
+        raise HTTPException(status_code=400, detail=str(ve))
+
+    product = await Product.get(
+        db,
+        columns=response.model_fields.keys() if fields else None,
+        id=product_id,
+    )
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
-    return ProductResponse(**product.model_dump())
+
+    body = response.from_row(product).model_dump_json().encode()
+    etag = await set_cached_response(
+        key, body, tags, versions, on_replica(db)
+    )
+    return etag_response(body, etag, if_none_match)
 
 
 @router.put("/{product_id}", response_model=ProductResponse)
@@ -123,7 +160,8 @@ async def update_product(
         setattr(product, key, value)
 
     await product.save(db)
-    return ProductResponse(**product.model_dump())
+    await invalidate_tags(LIST_TAG, product_tag(product.id))
+    return ProductResponse.from_row(product)
 
 
 @router.delete("/{product_id}")
@@ -138,4 +176,5 @@ async def delete_product(
         raise HTTPException(status_code=404, detail="Product not found")
 
     await product.delete(db)
+    await invalidate_tags(LIST_TAG, product_tag(product_id))
     return {"message": "Product deleted successfully"}
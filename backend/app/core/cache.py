@@ -0,0 +1,370 @@
+import json
+from collections import OrderedDict
+from hashlib import sha1
+from time import monotonic
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    TypeVar,
+)
+
+from fastapi import Response
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.redis import redis_client
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """In-process LRU cache whose entries also expire after a fixed TTL"""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[K, Tuple[float, V]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: K) -> Optional[V]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= monotonic():
+            del self._data[key]
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        if key in self._data:
+            self._data.move_to_end(key)
+        self._data[key] = (monotonic() + self.ttl, value)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, predicate: Callable[[K], bool]) -> int:
+        """Drop every entry whose key matches the predicate"""
+        keys = [key for key in self._data if predicate(key)]
+        for key in keys:
+            del self._data[key]
+        return len(keys)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+TOTALS_PREFIX = "totals:"
+TOTALS_VERSION_PREFIX = "totals-version:"
+# Set for READ_YOUR_WRITES_SECONDS after an invalidation, while replicas
+# may not have the write yet
+TOTALS_WRITTEN_PREFIX = "totals-written:"
+# Outlives any request by far, so a version cannot expire and restart
+# at a value a reader already saw while that reader is still running
+TOTALS_VERSION_TTL = 86400
+
+# KEYS holds the table's totals hash, its version key and its written
+# marker; ARGV the signature, total, TTL, the version read before counting
+# and whether the count ran on a replica. A total counted before a write is
+# never stored after that write's invalidation, because the invalidation
+# bumped the version, nor one a lagging replica counted just after it
+_set_total_script = redis_client.register_script(
+    """
+    local current = tonumber(redis.call("GET", KEYS[2]) or "0")
+    if current ~= tonumber(ARGV[4]) then
+        return 0
+    end
+    if ARGV[5] == "1" and redis.call("EXISTS", KEYS[3]) == 1 then
+        return 0
+    end
+    redis.call("HSET", KEYS[1], ARGV[1], ARGV[2])
+    redis.call("EXPIRE", KEYS[1], ARGV[3], "NX")
+    return 1
+    """
+)
+
+# KEYS holds the version keys of the tables, then their totals hashes,
+# then their written markers; ARGV the version TTL and the marker TTL
+_invalidate_totals_script = redis_client.register_script(
+    """
+    local tables = #KEYS / 3
+    for i = 1, tables do
+        redis.call("INCR", KEYS[i])
+        redis.call("EXPIRE", KEYS[i], ARGV[1])
+        redis.call("DEL", KEYS[tables + i])
+        if tonumber(ARGV[2]) > 0 then
+            redis.call("SET", KEYS[2 * tables + i], 1, "EX", ARGV[2])
+        end
+    end
+    return tables
+    """
+)
+
+
+def total_signature(signature: Any) -> str:
+    """Stable digest of a normalized filter/search signature"""
+    return sha1(
+        json.dumps(signature, sort_keys=True, default=str).encode()
+    ).hexdigest()
+
+
+async def get_cached_total(
+    table: str, signature: str
+) -> tuple[Optional[int], Optional[int]]:
+    """
+    Return a cached total, or on a miss the table's totals version to pass
+    to set_cached_total. Read it before counting
+    """
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.hget(TOTALS_PREFIX + table, signature)
+            pipe.get(TOTALS_VERSION_PREFIX + table)
+            cached, version = await pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Total cache unavailable: {e}")
+        return None, None
+    if cached is not None:
+        return int(cached), None
+    return None, int(version or 0)
+
+
+async def set_cached_total(
+    table: str,
+    signature: str,
+    total: int,
+    version: Optional[int],
+    replica: bool = False,
+) -> None:
+    """
+    Cache a total for a filter signature
+    All totals of a table expire COUNT_CACHE_TTL after the first is written.
+    Nothing is cached when the table was written after version was read, or
+    a replica counted it within READ_YOUR_WRITES_SECONDS of a write
+    """
+    if version is None:
+        return
+    try:
+        await _set_total_script(
+            keys=[
+                TOTALS_PREFIX + table,
+                TOTALS_VERSION_PREFIX + table,
+                TOTALS_WRITTEN_PREFIX + table,
+            ],
+            args=[
+                signature,
+                total,
+                settings.COUNT_CACHE_TTL,
+                version,
+                int(replica),
+            ],
+        )
+    except RedisError as e:
+        logger.warning(f"Could not cache total: {e}")
+
+
+async def invalidate_totals(tables: Iterable[str]) -> None:
+    """Drop every cached total of the given tables"""
+    tables = list(tables)
+    if not tables:
+        return
+    try:
+        await _invalidate_totals_script(
+            keys=[TOTALS_VERSION_PREFIX + table for table in tables]
+            + [TOTALS_PREFIX + table for table in tables]
+            + [TOTALS_WRITTEN_PREFIX + table for table in tables],
+            args=[TOTALS_VERSION_TTL, settings.READ_YOUR_WRITES_SECONDS],
+        )
+    except RedisError as e:
+        logger.warning(f"Could not invalidate cached totals: {e}")
+
+
+RESPONSE_PREFIX = "response:"
+TAG_PREFIX = "tag:"
+TAG_VERSION_PREFIX = "tag-version:"
+# Set for READ_YOUR_WRITES_SECONDS after an invalidation, while replicas
+# may not have the write yet
+TAG_WRITTEN_PREFIX = "tag-written:"
+# Outlives any request by far, so a version cannot expire and restart
+# at a value a reader already saw while that reader is still running
+TAG_VERSION_TTL = 86400
+
+# KEYS holds the version keys of the tags, then their tag sets, then their
+# written markers; ARGV the version TTL and the marker TTL. Bumps each
+# version and sets its marker, then deletes the tagged response keys and
+# the tag set
+_invalidate_tags_script = redis_client.register_script(
+    """
+    local tags = #KEYS / 3
+    local removed = 0
+    for i = 1, tags do
+        redis.call("INCR", KEYS[i])
+        redis.call("EXPIRE", KEYS[i], ARGV[1])
+        if tonumber(ARGV[2]) > 0 then
+            redis.call("SET", KEYS[2 * tags + i], 1, "EX", ARGV[2])
+        end
+        local members = redis.call("SMEMBERS", KEYS[tags + i])
+        for j = 1, #members, 500 do
+            local batch = {unpack(members, j, math.min(j + 499, #members))}
+            removed = removed + redis.call("DEL", unpack(batch))
+        end
+        redis.call("DEL", KEYS[tags + i])
+    end
+    return removed
+    """
+)
+
+# KEYS holds the response key, then the version keys, tag sets and
+# written markers of the tags; ARGV the body, ETag, TTL, whether the data
+# came from a replica and the versions the reader saw. A response rendered
+# from data read before a write is never stored after that write's
+# invalidation, because the invalidation bumped a version, nor one a
+# lagging replica served just after it
+_set_response_script = redis_client.register_script(
+    """
+    local tags = (#KEYS - 1) / 3
+    for i = 1, tags do
+        local current = tonumber(redis.call("GET", KEYS[1 + i]) or "0")
+        if current ~= tonumber(ARGV[4 + i]) then
+            return 0
+        end
+        local written = redis.call("EXISTS", KEYS[1 + 2 * tags + i])
+        if ARGV[4] == "1" and written == 1 then
+            return 0
+        end
+    end
+
+    redis.call("HSET", KEYS[1], "body", ARGV[1], "etag", ARGV[2])
+    redis.call("EXPIRE", KEYS[1], ARGV[3])
+    for i = 1, tags do
+        redis.call("SADD", KEYS[1 + tags + i], KEYS[1])
+        redis.call("EXPIRE", KEYS[1 + tags + i], ARGV[3])
+    end
+    return 1
+    """
+)
+
+
+def _tag_keys(tags: Sequence[str]) -> List[str]:
+    """Version keys of the tags, then their tag sets and written markers"""
+    return (
+        [TAG_VERSION_PREFIX + tag for tag in tags]
+        + [TAG_PREFIX + tag for tag in tags]
+        + [TAG_WRITTEN_PREFIX + tag for tag in tags]
+    )
+
+
+def response_cache_key(namespace: str, params: Any) -> str:
+    return f"{RESPONSE_PREFIX}{namespace}:{total_signature(params)}"
+
+
+async def get_cached_response(
+    key: str, tags: Sequence[str]
+) -> tuple[Optional[tuple[bytes, str]], Optional[List[int]]]:
+    """
+    Return (body, etag) of a cached response, or on a miss the current
+    versions of its tags to pass to set_cached_response. Read them before
+    querying the database
+    """
+    if settings.RESPONSE_CACHE_TTL <= 0:
+        return None, None
+    try:
+        async with redis_client.pipeline(transaction=False) as pipe:
+            pipe.hgetall(key)
+            pipe.mget([TAG_VERSION_PREFIX + tag for tag in tags])
+            cached, versions = await pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Response cache unavailable: {e}")
+        return None, None
+    if cached:
+        return (cached[b"body"], cached[b"etag"].decode()), None
+    return None, [int(version or 0) for version in versions]
+
+
+async def set_cached_response(
+    key: str,
+    body: bytes,
+    tags: Sequence[str],
+    versions: Optional[Sequence[int]],
+    replica: bool = False,
+) -> str:
+    """
+    Cache a serialized response under the given tags and return its ETag
+    Nothing is cached when a tag was invalidated after versions were read,
+    or when a replica served the data within READ_YOUR_WRITES_SECONDS of
+    an invalidation
+    """
+    etag = f'"{sha1(body).hexdigest()}"'
+    if settings.RESPONSE_CACHE_TTL <= 0 or versions is None:
+        return etag
+    try:
+        await _set_response_script(
+            keys=[key, *_tag_keys(tags)],
+            args=[
+                body,
+                etag,
+                settings.RESPONSE_CACHE_TTL,
+                int(replica),
+                *versions,
+            ],
+        )
+    except RedisError as e:
+        logger.warning(f"Could not cache response: {e}")
+    return etag
+
+
+async def invalidate_tags(*tags: str) -> None:
+    """Drop every cached response carrying one of the tags"""
+    try:
+        await _invalidate_tags_script(
+            keys=_tag_keys(tags),
+            args=[TAG_VERSION_TTL, settings.READ_YOUR_WRITES_SECONDS],
+        )
+    except RedisError as e:
+        logger.warning(f"Could not invalidate cached responses: {e}")
+
+
+def etag_response(
+    body: bytes, etag: str, if_none_match: Optional[str] = None
+) -> Response:
+    """JSON response carrying an ETag, or 304 when the client has it"""
+    headers = {"ETag": etag}
+    if if_none_match and etag in [
+        tag.strip() for tag in if_none_match.split(",")
+    ]:
+        return Response(status_code=304, headers=headers)
+    return Response(
+        content=body, media_type="application/json", headers=headers
+    )
@@ -1,4 +1,4 @@
-from typing import Any, List
+from typing import Any, Dict, List
 
 from pydantic import PostgresDsn, field_validator
 from pydantic_settings import BaseSettings
@@ -17,24 +17,79 @@ class Settings(BaseSettings):
         "https://localhost:3000",
     ]
     FRONTEND_URL: str = "http://localhost:3000"
+    # Comma-separated proxy addresses or networks whose X-Forwarded-For is
+    # trusted for the client address ("*" trusts every peer)
+    FORWARDED_ALLOW_IPS: List[str] | str = ["127.0.0.1"]
 
     # JWT Settings
     SECRET_KEY: str = "S3cur3P@ssw0rd!2025"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    # Access tokens are checked against Redis instead of the session table,
+    # using the revocation and suspension sets and a cached user snapshot
+    STATELESS_TOKEN_VERIFICATION: bool = False
 
     # Database Settings
     POSTGRES_SERVER: str = "postgres"
     POSTGRES_USER: str = "baiyit"
     POSTGRES_PASSWORD: str = "S3cur3P4ssw0rd"
     POSTGRES_DB: str = "baiyit"
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_POOL_WARMUP: int = 5
+    DB_POOL_SLOW_CHECKOUT_MS: float = 100.0
+    # Set to 0 behind a transaction-pooling PgBouncer
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    # Comma-separated postgresql+asyncpg DSNs of read replicas
+    DATABASE_REPLICA_URLS: List[str] | str = []
+    REPLICA_RETRY_SECONDS: int = 30
+    # How long replicas may lag a write: its writer reads from the primary
+    # and replica reads are not cached for this long after it
+    READ_YOUR_WRITES_SECONDS: int = 5
+
+    # Query & Cache Settings
+    COUNT_CACHE_TTL: int = 30
+    ESTIMATED_COUNT_THRESHOLD: int = 100000
+    RESPONSE_CACHE_TTL: int = 300
+
+    # OTP Settings
+    OTP_EXPIRE_MINUTES: int = 15
+    OTP_MAX_ATTEMPTS: int = 5
+    OTP_REQUEST_WINDOW_SECONDS: int = 900
+    OTP_REQUESTS_PER_EMAIL: int = 5
+    OTP_REQUESTS_PER_IP: int = 20
+
+    # Rate Limit Settings
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_DEFAULT: str = "300/minute"
+    # JSON object of "METHOD /route/{param}" to limits like "60/minute",
+    # keyed by the exact route path including any trailing slash
+    RATE_LIMITS: Dict[str, str] = {
+        "GET /products/": "120/minute",
+        "POST /auth/request-otp": "10/minute",
+        "POST /auth/verify-otp": "20/minute",
+        "POST /auth/register": "10/minute",
+    }
+    # Clients tracked per process while Redis is unavailable
+    RATE_LIMIT_LOCAL_SIZE: int = 10000
 
     # Redis Settings
     REDIS_URL: str = "redis://redis:6379/0"
 
+    # Maintenance Settings
+    REAPER_INTERVAL_SECONDS: int = 300
+    REAPER_BATCH_SIZE: int = 1000
+
     # Permit Settings
     PERMIT_API_KEY: str = "permit_key_4pi-k3y"
     PERMIT_PDP_URL: str = "https://cloudpdp.api.permit.io"
+    PERMISSION_CACHE_TTL: int = 60
+    PERMISSION_CACHE_SIZE: int = 10000
+    PERMISSION_ENGINE: str = "permit"  # "permit" or "local"
+    POLICY_FILE: str | None = None
 
     # Mail Settings
     MAIL_USERNAME: str = "no-reply@baiyit.com"
@@ -44,12 +99,20 @@ class Settings(BaseSettings):
     MAIL_SERVER: str = "mail.baiyit.com"
     MAIL_STARTTLS: bool = True
     MAIL_SSL: bool = False
-
-    @field_validator("ALLOWED_ORIGINS", mode="before")
+    EMAIL_WORKER_CONCURRENCY: int = 50
+    SMTP_POOL_SIZE: int = 5
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = 100
+
+    @field_validator(
+        "ALLOWED_ORIGINS",
+        "FORWARDED_ALLOW_IPS",
+        "DATABASE_REPLICA_URLS",
+        mode="before",
+    )
     @classmethod
-    def parse_allowed_origins(cls, v: Any) -> List[str] | Any:
+    def parse_url_list(cls, v: Any) -> List[str] | Any:
         if isinstance(v, str):
-            return [url.strip() for url in v.split(",")]
+            return [url.strip() for url in v.split(",") if url.strip()]
         return v
 
     def _build_database_url(self, scheme: str) -> str:
@@ -71,6 +134,10 @@ class Settings(BaseSettings):
     def SYNC_DATABASE_URL(self) -> str:
         return self._build_database_url("postgresql")
 
+    @property
+    def uses_local_policy(self) -> bool:
+        return self.PERMISSION_ENGINE.lower() == "local"
+
     @property
     def is_development(self) -> bool:
         return self.ENVIRONMENT.lower() == "development"
@@ -1,18 +1,320 @@
-from typing import AsyncGenerator
+import asyncio
+import itertools
+from contextlib import AsyncExitStack, asynccontextmanager
+from time import monotonic, perf_counter
+from typing import (
+    Any,
+    AsyncGenerator,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Optional,
+    Sequence,
+)
 
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+import jwt
+from fastapi import Depends, Request
+from redis.exceptions import RedisError
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.ext.compiler import compiles
 from sqlalchemy.ext.declarative import declarative_base
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.sql.expression import ClauseElement, Executable
 
+from app.core.cache import invalidate_totals
 from app.core.config import settings
+from app.core.logging import logger
+from app.core.redis import redis_client
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait for a connection"""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.slow_checkouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.peak_checked_out = 0
+
+    def _do_get(self) -> Any:
+        started = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = perf_counter() - started
+            self.checkouts += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            self.peak_checked_out = max(
+                self.peak_checked_out, self.checkedout()
+            )
+            if waited * 1000 >= settings.DB_POOL_SLOW_CHECKOUT_MS:
+                self.slow_checkouts += 1
+                logger.warning(
+                    f"Waited {waited * 1000:.0f}ms for a database connection "
+                    f"({self.checkedout()}/{self.capacity} checked out)"
+                )
+
+    @property
+    def capacity(self) -> int:
+        return self.size() + max(self._max_overflow, 0)
 
-engine = create_async_engine(settings.DATABASE_URL, echo=settings.DEBUG)
+    def stats(self) -> Dict[str, Any]:
+        checked_out = self.checkedout()
+        return {
+            "size": self.size(),
+            "capacity": self.capacity,
+            "checked_out": checked_out,
+            "idle": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "saturation": round(checked_out / self.capacity, 3),
+            "peak_checked_out": self.peak_checked_out,
+            "checkouts": self.checkouts,
+            "slow_checkouts": self.slow_checkouts,
+            "avg_wait_ms": round(
+                self.total_wait * 1000 / max(self.checkouts, 1), 3
+            ),
+            "max_wait_ms": round(self.max_wait * 1000, 3),
+        }
+
+
+def _create_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        echo=settings.DEBUG,
+        poolclass=InstrumentedPool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        connect_args={
+            # SQLAlchemy's prepared statement cache and asyncpg's own
+            "prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+        },
+    )
+
+
+engine = _create_engine(settings.DATABASE_URL)
 async_session = async_sessionmaker(
     bind=engine, class_=AsyncSession, expire_on_commit=False
 )
 
+replica_engines = [
+    _create_engine(url) for url in settings.DATABASE_REPLICA_URLS
+]
+replica_sessions = [
+    async_sessionmaker(
+        bind=replica, class_=AsyncSession, expire_on_commit=False
+    )
+    for replica in replica_engines
+]
+# Replicas that failed to connect are skipped until this monotonic time
+_replica_down_until = [0.0] * len(replica_engines)
+_replica_turn = itertools.count()
+
+RECENT_WRITE_PREFIX = "db:recent-write:"
+UNIT_OF_WORK = "unit_of_work"
+# Set on sessions bound to a read replica
+REPLICA = "replica"
+# Tables flushed in the current transaction, see app.models
+WRITTEN_TABLES = "written_tables"
+
 Base = declarative_base()
 
 
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) wrapper that keeps the statement's bind params"""
+
+    inherit_cache = False
+
+    def __init__(self, statement: Any, analyze: bool = False) -> None:
+        self.statement = statement
+        self.analyze = analyze
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler: Any, **kw: Any) -> str:
+    options = "ANALYZE, FORMAT JSON" if element.analyze else "FORMAT JSON"
+    return f"EXPLAIN ({options}) " + compiler.process(element.statement, **kw)
+
+
+@event.listens_for(Session, "after_flush")
+def _note_write(session: Session, _: Any) -> None:
+    session.info["wrote"] = True
+
+
+async def mark_recent_write(user_id: str) -> None:
+    """Pin a user's reads to the primary for READ_YOUR_WRITES_SECONDS"""
+    try:
+        await redis_client.set(
+            RECENT_WRITE_PREFIX + user_id,
+            1,
+            ex=settings.READ_YOUR_WRITES_SECONDS,
+        )
+    except RedisError as e:
+        logger.warning(f"Could not record recent write: {e}")
+
+
+async def has_recent_write(user_id: str) -> bool:
+    try:
+        return bool(await redis_client.exists(RECENT_WRITE_PREFIX + user_id))
+    except RedisError as e:
+        # Without the marker we cannot rule out stale reads
+        logger.warning(f"Could not check recent writes: {e}")
+        return True
+
+
+def _request_user_id(request: Request) -> Optional[str]:
+    """
+    User id claimed by the bearer token, used for routing only
+    The token is verified separately by the authentication dependencies
+    """
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        payload = jwt.decode(token, options={"verify_signature": False})
+        return payload.get("user_id")
+    except jwt.InvalidTokenError:
+        return None
+
+
+async def _open_replica_session() -> Optional[AsyncSession]:
+    """Connect to the next healthy replica in round-robin order"""
+    count = len(replica_sessions)
+    start = next(_replica_turn)
+    for offset in range(count):
+        index = (start + offset) % count
+        if _replica_down_until[index] > monotonic():
+            continue
+
+        session = replica_sessions[index]()
+        session.info[REPLICA] = True
+        try:
+            await session.connection()
+            return session
+        except (DBAPIError, OSError) as e:
+            await session.close()
+            _replica_down_until[index] = (
+                monotonic() + settings.REPLICA_RETRY_SECONDS
+            )
+            logger.warning(f"Read replica {index} unavailable: {e}")
+    return None
+
+
 async def get_db() -> AsyncGenerator[AsyncSession, None]:
     async with async_session() as session:
         yield session
+        user_id = session.info.get("user_id")
+        if replica_engines and user_id and session.info.get("wrote"):
+            await mark_recent_write(user_id)
+
+
+def in_unit_of_work(session: AsyncSession | Session) -> bool:
+    return bool(session.info.get(UNIT_OF_WORK))
+
+
+def on_replica(session: AsyncSession) -> bool:
+    """Whether reads may lag the primary, so cache writes need care"""
+    return bool(session.info.get(REPLICA))
+
+
+async def commit(session: AsyncSession) -> None:
+    """
+    Commit, then drop the cached totals of every table the transaction
+    wrote before returning, so the caller's next read cannot see them
+    """
+    await session.commit()
+    tables = session.info.pop(WRITTEN_TABLES, None)
+    if tables and settings.COUNT_CACHE_TTL > 0:
+        await invalidate_totals(tables)
+
+
+@asynccontextmanager
+async def unit_of_work(session: AsyncSession) -> AsyncIterator[AsyncSession]:
+    """
+    Make BaseModel writes on the session flush only and commit them once on
+    exit, or roll all of them back when the block raises
+    """
+    session.info[UNIT_OF_WORK] = True
+    try:
+        yield session
+        await commit(session)
+    except BaseException:
+        await session.rollback()
+        raise
+    finally:
+        session.info.pop(UNIT_OF_WORK, None)
+
+
+async def get_uow_db(
+    db: AsyncSession = Depends(get_db),
+) -> AsyncGenerator[AsyncSession, None]:
+    """get_db wrapped in a unit of work committed after the handler returns"""
+    async with unit_of_work(db):
+        yield db
+
+
+async def get_read_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    """
+    Session for read-only endpoints, load-balanced across the replicas
+    Falls back to the primary when no replica is reachable or the caller
+    wrote within the last READ_YOUR_WRITES_SECONDS
+    """
+    replica = None
+    if replica_sessions:
+        user_id = _request_user_id(request)
+        if user_id is None or not await has_recent_write(user_id):
+            replica = await _open_replica_session()
+
+    async with replica or async_session() as session:
+        yield session
+
+
+def pool_stats() -> Dict[str, Any]:
+    return engine.pool.stats()  # type: ignore
+
+
+async def warm_up_pool(
+    connections: int,
+    statements: Sequence[Callable[[AsyncSession], Awaitable[Any]]] = (),
+) -> None:
+    """
+    Open and validate connections up front so the first requests after boot
+    do not pay for them, running each hot statement on every connection to
+    fill its prepared statement cache
+    """
+    connections = min(connections, engine.pool.size())  # type: ignore
+    if connections <= 0:
+        return
+
+    async def warm(session: AsyncSession) -> None:
+        await session.execute(text("SELECT 1"))
+        for statement in statements:
+            await statement(session)
+
+    started = perf_counter()
+    async with AsyncExitStack() as stack:
+        # Hold every session open at once so each one gets its own connection
+        sessions = [
+            await stack.enter_async_context(async_session())
+            for _ in range(connections)
+        ]
+        await asyncio.gather(*(warm(session) for session in sessions))
+    logger.info(
+        f"Warmed {connections} database connections in "
+        f"{(perf_counter() - started) * 1000:.0f}ms"
+    )
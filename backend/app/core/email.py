@@ -1,14 +1,19 @@
+from email.message import EmailMessage
+from email.utils import formataddr
+from functools import lru_cache
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Optional
 
 from fastapi_mail import ConnectionConfig, FastMail, MessageSchema
 from fastapi_mail.schemas import MessageType
 from mjml import mjml_to_html
 from pydantic import SecretStr
-from pystache import render
+from pystache import Renderer, parse
+from pystache.parsed import ParsedTemplate
 
 from app.core.config import settings
 from app.core.redis import email_queue
+from app.core.smtp import SMTPPool
 
 TEMPLATE_FOLDER = Path(__file__).parent.parent / "emails"
 
@@ -25,21 +30,71 @@ email_config = ConnectionConfig(
 )
 fm = FastMail(email_config)
 
+# Set by the async email worker so jobs share pooled SMTP connections
+smtp_pool: Optional[SMTPPool] = None
 
-def send_email(
-    subject: str, email: str, template_name: str, context: Dict[str, str] = {}
-) -> None:
-    """Send email using MJML template"""
+
+renderer = Renderer()
+
+
+@lru_cache(maxsize=None)
+def get_template(template_name: str) -> ParsedTemplate:
+    """Compile an MJML template to HTML once and keep it pre-parsed"""
     template_path = TEMPLATE_FOLDER / template_name
     with open(template_path, "r") as f:
-        template_content = f.read()
-        mjml_result = mjml_to_html(template_content)
-        html_content = render(mjml_result.html, context)  # type: ignore
+        mjml_result = mjml_to_html(f.read())
+    return parse(mjml_result.html)  # type: ignore
+
+
+def precompile_templates() -> None:
+    """Warm the template cache with every template in the emails folder"""
+    for template_path in TEMPLATE_FOLDER.glob("*.mjml"):
+        get_template(template_path.name)
+
+
+def render_email(template_name: str, context: Dict[str, str]) -> str:
+    return renderer.render(get_template(template_name), context)
+
 
-    message = MessageSchema(
+def build_message(subject: str, email: str, html: str) -> EmailMessage:
+    """HTML message from the configured sender, as FastMail would send it"""
+    message = EmailMessage()
+    message["Subject"] = subject
+    message["From"] = formataddr(
+        (email_config.MAIL_FROM_NAME, str(email_config.MAIL_FROM))
+    )
+    message["To"] = email
+    message.set_content(html, subtype="html")
+    return message
+
+
+async def deliver_email(
+    subject: str, email: str, template_name: str, context: Dict[str, str]
+) -> None:
+    """Email job: render the cached template and send it"""
+    html = render_email(template_name, context)
+    if smtp_pool is not None:
+        await smtp_pool.send(build_message(subject, email, html))
+        return
+
+    await fm.send_message(
+        MessageSchema(
+            subject=subject,
+            recipients=[email],
+            body=html,
+            subtype=MessageType.html,
+        )
+    )
+
+
+async def send_email(
+    subject: str, email: str, template_name: str, context: Dict[str, str] = {}
+) -> None:
+    """Queue an email; rendering and sending happen in the email worker"""
+    await email_queue.enqueue(
+        deliver_email,
         subject=subject,
-        recipients=[email],
-        body=html_content,
-        subtype=MessageType.html,
+        email=email,
+        template_name=template_name,
+        context=context,
     )
-    email_queue.enqueue(fm.send_message, message=message)  # type: ignore
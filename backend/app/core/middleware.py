@@ -1,4 +1,5 @@
-from typing import Annotated, Awaitable, Callable
+import asyncio
+from typing import Annotated, Any, Awaitable, Callable, Coroutine, Optional
 
 from fastapi import Depends, HTTPException, Security
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
@@ -6,10 +7,13 @@ from permit import Permit
 from permit.api.models import RoleAssignmentCreate, UserCreate
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.cache import TTLCache
 from app.core.config import settings
-from app.core.database import get_db
-from app.core.security.jwt import verify_token
-from app.models.user import User
+from app.core.database import get_db, get_read_db
+from app.core.logging import logger
+from app.core.security.jwt import forget_user, verify_token
+from app.core.security.policy import POLICY_FILE, LocalPolicy
+from app.models.user import User, UserRole
 
 permit = Permit(
     pdp=settings.PERMIT_PDP_URL,
@@ -18,6 +22,24 @@ permit = Permit(
 
 security = HTTPBearer()
 
+local_policy: LocalPolicy | None = (
+    LocalPolicy.from_file(settings.POLICY_FILE or POLICY_FILE)
+    if settings.uses_local_policy
+    else None
+)
+_background_tasks: set[asyncio.Task[None]] = set()
+
+# Decisions keyed by (user_id, action, resource)
+permission_cache: TTLCache[tuple[str, str, str], bool] = TTLCache(
+    maxsize=settings.PERMISSION_CACHE_SIZE,
+    ttl=settings.PERMISSION_CACHE_TTL,
+)
+
+
+def invalidate_permissions(user_id: str) -> int:
+    """Drop cached permission decisions for a user"""
+    return permission_cache.invalidate(lambda key: key[0] == user_id)
+
 
 async def get_user(
     credentials: Annotated[HTTPAuthorizationCredentials, Security(security)],
@@ -26,12 +48,59 @@ async def get_user(
     """ """
     token = credentials.credentials
     auth = await verify_token(db, token)
+    # Lets get_db pin the user's next reads to the primary after a write
+    db.info["user_id"] = auth.user.id
+    return auth.user
+
+
+async def get_read_user(
+    credentials: Annotated[HTTPAuthorizationCredentials, Security(security)],
+    read_db: AsyncSession = Depends(get_read_db),
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    """
+    get_user for read-only endpoints, verified on a read replica
+    Sessions the replica has not caught up with are checked on the primary
+    """
+    token = credentials.credentials
+    try:
+        auth = await verify_token(read_db, token)
+    except HTTPException as e:
+        if e.status_code != 401 or read_db.bind is db.bind:
+            raise
+        auth = await verify_token(db, token)
     return auth.user
 
 
+async def get_admin(
+    user: Annotated[User, Depends(get_read_user)],
+) -> User:
+    """get_read_user restricted to admins, for internal endpoints"""
+    if user.role != UserRole.admin:
+        raise HTTPException(
+            status_code=403,
+            detail="This endpoint is only available to administrators",
+        )
+    return user
+
+
+def _reconcile(coro: Coroutine[Any, Any, Any], description: str) -> None:
+    """Run a Permit call in the background when the local engine is active"""
+
+    async def runner() -> None:
+        try:
+            await coro
+        except Exception as e:
+            logger.error(f"Permit reconciliation failed ({description}): {e}")
+
+    task = asyncio.create_task(runner())
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+
+
 async def sync_user(user: User) -> None:
     """Syncs user information with Permit."""
-    await permit.api.users.sync(  # type: ignore
+    sync = permit.api.users.sync(  # type: ignore
         UserCreate(
             key=user.id,
             email=user.email,
@@ -39,31 +108,54 @@ async def sync_user(user: User) -> None:
             last_name=user.last_name,
         )
     )
+    if local_policy is not None:
+        _reconcile(sync, f"sync user {user.id}")  # type: ignore
+    else:
+        await sync
 
 
 async def assign_role(user_id: str, role: str) -> None:
-    await permit.api.users.assign_role(
+    # The cached snapshot carries the role checked by the local policy
+    await forget_user(user_id)
+    assignment = permit.api.users.assign_role(
         RoleAssignmentCreate(
             user=user_id,
             role=role,
             tenant="default",
         )
     )
+    if local_policy is not None:
+        _reconcile(assignment, f"assign role {role} to {user_id}")
+    else:
+        await assignment
+    invalidate_permissions(user_id)
 
 
 async def check_permission(
     user_id: str,
     action: str,
     resource: str,
+    role: Optional[str] = None,
 ) -> bool:
     """Checks if the user has permission to perform the action on the resource."""
-    allowed = await permit.check(  # type: ignore
-        user_id,
-        action,
-        {
-            "type": resource,
-        },
-    )
+    key = (user_id, action, resource)
+    if local_policy is not None:
+        allowed = local_policy.is_allowed(role, action, resource)
+    else:
+        allowed = permission_cache.get(key)
+
+    if allowed is None:
+        allowed = bool(
+            await permit.check(  # type: ignore
+                user_id,
+                action,
+                {
+                    "type": resource,
+                },
+            )
+        )
+        permission_cache.set(key, allowed)
+
     if not allowed:
         raise HTTPException(
             status_code=403,
@@ -77,10 +169,13 @@ def has_permission(
 ) -> Callable[[User], Awaitable[User]]:
     """Returns a dependency function that checks if the user has permission to perform the action on the resource."""
 
+    # Read checks authenticate on a replica like the endpoints they guard
+    authenticate = get_read_user if action == "read" else get_user
+
     async def permission_dependency(
-        user: Annotated[User, Depends(get_user)],
+        user: Annotated[User, Depends(authenticate)],
     ) -> User:
-        await check_permission(user.id, action, resource)
+        await check_permission(user.id, action, resource, user.role.value)
         return user
 
     return permission_dependency
@@ -0,0 +1,236 @@
+import math
+from collections import Counter
+from time import monotonic
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import jwt
+from redis.exceptions import RedisError
+from starlette.responses import JSONResponse
+from starlette.routing import BaseRoute, Match, Route
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.redis import redis_client
+
+RATE_LIMIT_PREFIX = "ratelimit:"
+# Seconds to keep using the in-process buckets after Redis fails
+REDIS_RETRY_SECONDS = 5
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# Refills the bucket for the time elapsed since its last request, then
+# takes a token if one is left. Uses the Redis clock so API processes
+# with drifting clocks share buckets correctly
+_take_token_script = redis_client.register_script(
+    """
+    local rate = tonumber(ARGV[1])
+    local capacity = tonumber(ARGV[2])
+    local time = redis.call("TIME")
+    local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+
+    local bucket = redis.call("HMGET", KEYS[1], "tokens", "updated")
+    local tokens = tonumber(bucket[1]) or capacity
+    local updated = tonumber(bucket[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+
+    local allowed = 0
+    local retry_after = 0
+    if tokens >= 1 then
+        tokens = tokens - 1
+        allowed = 1
+    else
+        retry_after = math.ceil((1 - tokens) / rate)
+    end
+
+    redis.call("HSET", KEYS[1], "tokens", tokens, "updated", now)
+    redis.call("EXPIRE", KEYS[1], math.ceil(capacity / rate))
+    return {allowed, retry_after}
+    """
+)
+
+
+class RateLimit:
+    """Token bucket of capacity requests that refills over period seconds"""
+
+    def __init__(self, capacity: int, period: float) -> None:
+        self.capacity = capacity
+        self.period = period
+        self.rate = capacity / period
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateLimit":
+        """Parse limits such as 60/minute or 5/second"""
+        count, _, period = spec.partition("/")
+        if period not in PERIODS:
+            raise ValueError(f"Invalid rate limit: {spec}")
+        return cls(int(count), PERIODS[period])
+
+
+class LocalBucket:
+    def __init__(self, tokens: float) -> None:
+        self.tokens = tokens
+        self.updated = monotonic()
+
+
+class RateLimiter:
+    """
+    Token buckets shared by all API processes through Redis
+    While Redis is unavailable each process enforces the limits with its
+    own buckets, so a client may get up to one full limit per process
+    """
+
+    def __init__(self, default: str, limits: Dict[str, str]) -> None:
+        self.default = RateLimit.parse(default)
+        self.limits = {
+            route: RateLimit.parse(spec) for route, spec in limits.items()
+        }
+        self._routes: Optional[List[Tuple[Route, str, str]]] = None
+        # An idle bucket refills completely within its period, and every
+        # take restarts its TTL, so evicting it after the longest period of
+        # idleness never resets a partially used one
+        longest = max(
+            limit.period for limit in [self.default, *self.limits.values()]
+        )
+        self._local: TTLCache[str, LocalBucket] = TTLCache(
+            maxsize=settings.RATE_LIMIT_LOCAL_SIZE, ttl=longest
+        )
+        self._redis_down_until = 0.0
+        self.allowed = 0
+        self.limited: Counter[str] = Counter()
+        self.fallbacks = 0
+
+    def bind(self, routes: Sequence[BaseRoute]) -> None:
+        """
+        Match the configured limits to the app's routes
+        Raises ValueError for limits naming no route, which would otherwise
+        silently fall back to the default limit
+        """
+        self._routes = [
+            (route, method, f"{method} {route.path}")
+            for route in routes
+            if isinstance(route, Route)
+            for method in route.methods or []
+            if f"{method} {route.path}" in self.limits
+        ]
+        unmatched = set(self.limits) - {name for _, _, name in self._routes}
+        if unmatched:
+            names = ", ".join(sorted(unmatched))
+            raise ValueError(f"Rate limits for unknown routes: {names}")
+
+    def resolve(self, scope: Scope) -> Tuple[str, RateLimit]:
+        """Configured route of a request and its limit, or the default"""
+        if self._routes is None:
+            self.bind(scope["app"].router.routes)
+        for route, method, name in self._routes or []:
+            if method != scope["method"]:
+                continue
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return name, self.limits[name]
+        return "*", self.default
+
+    def _take_local(self, key: str, limit: RateLimit) -> Tuple[bool, int]:
+        bucket = self._local.get(key)
+        if bucket is None:
+            bucket = LocalBucket(limit.capacity)
+        # Setting it again restarts the TTL from this use
+        self._local.set(key, bucket)
+
+        now = monotonic()
+        bucket.tokens = min(
+            limit.capacity,
+            bucket.tokens + (now - bucket.updated) * limit.rate,
+        )
+        bucket.updated = now
+        if bucket.tokens >= 1:
+            bucket.tokens -= 1
+            return True, 0
+        return False, math.ceil((1 - bucket.tokens) / limit.rate)
+
+    async def take(self, key: str, limit: RateLimit) -> Tuple[bool, int]:
+        """Take a token for key; returns (allowed, retry_after_seconds)"""
+        if self._redis_down_until <= monotonic():
+            try:
+                allowed, retry_after = await _take_token_script(
+                    keys=[RATE_LIMIT_PREFIX + key],
+                    args=[limit.rate, limit.capacity],
+                )
+                return bool(allowed), int(retry_after)
+            except RedisError as e:
+                logger.warning(f"Rate limiting in-process only: {e}")
+                self._redis_down_until = monotonic() + REDIS_RETRY_SECONDS
+
+        self.fallbacks += 1
+        return self._take_local(key, limit)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "allowed": self.allowed,
+            "limited": sum(self.limited.values()),
+            "limited_by_route": dict(self.limited),
+            "fallbacks": self.fallbacks,
+            "redis_available": self._redis_down_until <= monotonic(),
+        }
+
+
+def client_key(scope: Scope) -> str:
+    """
+    Bucket owner: the user of a valid bearer token, otherwise the client IP
+    The signature is checked so clients cannot spread requests over
+    made-up user ids. The client IP is the one ProxyHeadersMiddleware
+    resolved, so it is only taken from X-Forwarded-For when a trusted
+    proxy (FORWARDED_ALLOW_IPS) sent the request
+    """
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                try:
+                    payload = jwt.decode(  # type: ignore
+                        token, settings.SECRET_KEY, algorithms=["HS256"]
+                    )
+                    return f"user:{payload['user_id']}"
+                except (jwt.InvalidTokenError, KeyError):
+                    pass
+            break
+
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+rate_limiter = RateLimiter(settings.RATE_LIMIT_DEFAULT, settings.RATE_LIMITS)
+
+
+class RateLimitMiddleware:
+    """Reject requests over their route's limit with 429 and Retry-After"""
+
+    def __init__(
+        self, app: ASGIApp, limiter: RateLimiter = rate_limiter
+    ) -> None:
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(
+        self, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if scope["type"] != "http" or not settings.RATE_LIMIT_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        route, limit = self.limiter.resolve(scope)
+        allowed, retry_after = await self.limiter.take(
+            f"{route}:{client_key(scope)}", limit
+        )
+        if allowed:
+            self.limiter.allowed += 1
+            await self.app(scope, receive, send)
+            return
+
+        self.limiter.limited[route] += 1
+        response = JSONResponse(
+            {"detail": "Too many requests. Please slow down and try again."},
+            status_code=429,
+            headers={"Retry-After": str(max(retry_after, 1))},
+        )
+        await response(scope, receive, send)
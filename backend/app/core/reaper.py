@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from time import perf_counter
+from typing import Dict
+
+from sqlalchemy import Delete, Engine, create_engine, delete, select
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.models.auth import Auth
+
+
+@lru_cache(maxsize=None)
+def get_engine() -> Engine:
+    """
+    Jobs run in the synchronous worker or on a thread of the async one, so
+    the reaper keeps a small blocking engine of its own. It is created on
+    the first job, never in the API processes that only schedule it
+    """
+    return create_engine(
+        settings.SYNC_DATABASE_URL,
+        pool_size=1,
+        max_overflow=0,
+        pool_pre_ping=True,
+    )
+
+
+def _expired_sessions(cutoff: datetime, batch_size: int) -> Delete:
+    # Tokens are reissued on refresh, so a session is dead once its last
+    # refresh token has expired
+    batch = (
+        select(Auth.id)
+        .where(Auth.updated_at < cutoff)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    return delete(Auth).where(Auth.id.in_(batch))
+
+
+def _run_batches(name: str, statement: Delete, batch_size: int) -> int:
+    """
+    Run statement in its own short transaction until a batch comes back
+    short, so row locks are only ever held for one batch
+    """
+    removed = 0
+    batches = 0
+    while True:
+        started = perf_counter()
+        with get_engine().begin() as connection:
+            rowcount = connection.execute(statement).rowcount
+        removed += rowcount
+        batches += 1
+        logger.info(
+            f"Reaped {rowcount} {name} in "
+            f"{(perf_counter() - started) * 1000:.1f}ms (batch {batches})"
+        )
+        if rowcount < batch_size:
+            return removed
+
+
+def reap_expired(batch_size: int | None = None) -> Dict[str, int]:
+    """Maintenance job: delete expired sessions"""
+    batch_size = batch_size or settings.REAPER_BATCH_SIZE
+    now = datetime.now(timezone.utc)
+    session_cutoff = now - timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+
+    reaped = {
+        "sessions": _run_batches(
+            "expired sessions",
+            _expired_sessions(session_cutoff, batch_size),
+            batch_size,
+        ),
+    }
+    logger.info(f"Reaper removed {reaped['sessions']} sessions")
+    return reaped
@@ -1,17 +1,87 @@
-from redis import Redis
+import asyncio
+from typing import Any, Callable
+
+from redis.asyncio import Redis
+from redis.exceptions import RedisError
 from rq import Queue
+from rq.job import Job, JobStatus
+from rq.utils import now
 
 from app.core.config import settings
+from app.core.logging import logger
 
+# Connection pool for the API process, closed in the FastAPI lifespan
 redis_client: Redis = Redis.from_url(settings.REDIS_URL)  # type: ignore
 
 
-email_queue = Queue("email", connection=redis_client)
+class AsyncQueue:
+    """
+    Enqueue-only view of an RQ queue on the asyncio Redis client
+    Jobs are written in the same layout as Queue.enqueue so regular RQ
+    workers pick them up. The layout follows the rq version pinned in
+    requirements.txt; tests/test_queue.py runs such a job on a stock worker
+    """
+
+    def __init__(
+        self,
+        name: str,
+        connection: Redis,
+        default_timeout: int = Queue.DEFAULT_TIMEOUT,
+    ) -> None:
+        self.name = name
+        self.connection = connection
+        self.default_timeout = default_timeout
+        self.key = Queue.redis_queue_namespace_prefix + name
+
+    async def enqueue(
+        self, func: Callable[..., Any], *args: Any, **kwargs: Any
+    ) -> Job:
+        # The job only uses its connection for I/O we never trigger here
+        job = Job.create(
+            func,
+            args=args,
+            kwargs=kwargs,
+            connection=self.connection,  # type: ignore
+            origin=self.name,
+            status=JobStatus.QUEUED,
+            timeout=self.default_timeout,
+        )
+        job.enqueued_at = now()
+
+        async with self.connection.pipeline(transaction=True) as pipe:
+            pipe.sadd(Queue.redis_queues_keys, self.key)
+            pipe.hset(job.key, mapping=job.to_dict())  # type: ignore
+            pipe.rpush(self.key, job.id)
+            await pipe.execute()
+        return job
+
+
+email_queue = AsyncQueue("email", connection=redis_client)
+maintenance_queue = AsyncQueue("maintenance", connection=redis_client)
 
 QUEUE = {
     "email": email_queue,
+    "maintenance": maintenance_queue,
 }
 
 
+async def enqueue_periodically(
+    queue: AsyncQueue, func: Callable[..., Any], interval: int
+) -> None:
+    """
+    Enqueue func every interval seconds for as long as the app runs
+    Every API process runs this loop; a Redis key claims each interval so
+    the job is queued once however many processes there are
+    """
+    key = f"schedule:{func.__module__}.{func.__qualname__}"
+    while True:
+        try:
+            if await queue.connection.set(key, 1, nx=True, ex=interval):
+                await queue.enqueue(func)
+        except RedisError as e:
+            logger.warning(f"Could not schedule {func.__qualname__}: {e}")
+        await asyncio.sleep(interval)
+
+
 def get_redis() -> Redis:
     return redis_client
@@ -0,0 +1,15 @@
+from typing import Any
+
+from fastapi.responses import JSONResponse
+from pydantic_core import to_json
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered straight to bytes by pydantic-core
+    Datetimes, enums, UUIDs and pydantic models are encoded natively, so
+    endpoints may return models without a jsonable_encoder pass
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
@@ -1,21 +1,32 @@
 from datetime import datetime, timedelta, timezone
+from uuid import uuid4
 
 import jwt
 from fastapi import HTTPException
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from redis.exceptions import RedisError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
+from app.core.logging import logger
+from app.core.security import revocation
+from app.models import JOINED, LoadPlan
 from app.models.auth import Auth
 from app.models.user import User
 from app.schemas.auth import AuthResponse
 from app.schemas.user import UserResponse
 
 
+# Token verification only needs the session's user
+AUTH_LOAD: LoadPlan = {"user": JOINED}
+
+
 class TokenData(BaseModel):
     user_id: str
     exp: datetime
     token_type: str
+    # Unique per token so sessions issued in the same second differ
+    jti: str = Field(default_factory=lambda: uuid4().hex)
 
 
 def create_token(user_id: str, token_type: str = "access") -> str:
@@ -31,6 +42,41 @@ def create_token(user_id: str, token_type: str = "access") -> str:
     )
 
 
+async def _verify_stateless(token: str, user_id: str) -> Auth | None:
+    """
+    Authenticate an access token from the revocation set and user snapshot
+    Returns None when Redis misses or is unavailable so the caller falls
+    back to the session table
+    """
+    try:
+        revoked, suspended, user = await revocation.lookup(token, user_id)
+    except RedisError as e:
+        logger.warning(f"Stateless token verification unavailable: {e}")
+        return None
+
+    if revoked:
+        raise HTTPException(
+            status_code=401,
+            detail="Authentication session not found. Please sign in again.",
+        )
+
+    if suspended or (user is not None and user.is_suspended):
+        raise HTTPException(
+            status_code=401,
+            detail="Your account has been suspended. Please contact our support team at support@baiyit.com for assistance.",
+        )
+
+    if user is None or user.id != user_id:
+        return None
+
+    # Detached session object, never added to the database session
+    return Auth(
+        user_id=user.id,
+        access_token_hash=revocation.token_digest(token),
+        user=user,
+    )
+
+
 async def verify_token(
     db: AsyncSession, token: str, token_type: str = "access"
 ) -> Auth:
@@ -43,14 +89,21 @@ async def verify_token(
                 detail=f"Invalid token type. Expected {token_type} token.",
             )
 
-        if token_type == "access":
-            auth = await Auth.get(
-                db, access_token=token, load_relationships=True
+        stateless = (
+            token_type == "access" and settings.STATELESS_TOKEN_VERIFICATION
+        )
+        if stateless:
+            stateless_auth = await _verify_stateless(
+                token, payload["user_id"]
             )
+            if stateless_auth is not None:
+                return stateless_auth
+
+        digest = revocation.token_digest(token)
+        if token_type == "access":
+            auth = await Auth.get(db, AUTH_LOAD, access_token_hash=digest)
         else:
-            auth = await Auth.get(
-                db, refresh_token=token, load_relationships=True
-            )
+            auth = await Auth.get(db, AUTH_LOAD, refresh_token_hash=digest)
 
         if not auth:
             raise HTTPException(
@@ -71,6 +124,9 @@ async def verify_token(
                 detail="Your account has been suspended. Please contact our support team at support@baiyit.com for assistance.",
             )
 
+        if stateless:
+            await revocation.cache_user(auth.user)
+
         return auth
     except jwt.ExpiredSignatureError:
         raise HTTPException(
@@ -84,16 +140,74 @@ async def verify_token(
         )
 
 
+async def _revoke(*tokens: tuple[str, datetime]) -> None:
+    """
+    Put tokens on the revocation set before their session is changed
+    Stateless verification never reads the session table, so when the
+    entries cannot be written the session is left untouched instead
+    """
+    if not settings.STATELESS_TOKEN_VERIFICATION:
+        return
+    try:
+        await revocation.revoke(*tokens)
+    except RedisError as e:
+        logger.error(f"Could not write token revocation: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="We could not update your session right now. Please try again shortly.",
+        )
+
+
+async def forget_user(user_id: str) -> None:
+    """
+    Drop a user's snapshot after a change that affects authorization, such
+    as a role change, so stateless verification reloads the user
+    """
+    if not settings.STATELESS_TOKEN_VERIFICATION:
+        return
+    try:
+        await revocation.forget_user(user_id)
+    except RedisError as e:
+        logger.error(f"Could not drop user snapshot: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="We could not update this account right now. Please try again shortly.",
+        )
+
+
+async def suspend_user(
+    db: AsyncSession, user: User, suspended: bool = True
+) -> User:
+    """
+    Suspend or reinstate a user, updating the suspension set first so
+    stateless verification never outlives the change
+    """
+    if settings.STATELESS_TOKEN_VERIFICATION:
+        try:
+            await revocation.set_suspended(user.id, suspended)
+        except RedisError as e:
+            logger.error(f"Could not update user suspension: {e}")
+            raise HTTPException(
+                status_code=503,
+                detail="We could not update this account right now. Please try again shortly.",
+            )
+
+    user.is_suspended = suspended
+    return await user.save(db)
+
+
 async def generate_tokens(db: AsyncSession, user: User) -> AuthResponse:
     """Generate new access and refresh tokens"""
     access_token = create_token(user.id, "access")
     refresh_token = create_token(user.id, "refresh")
 
-    auth = Auth(
-        access_token=access_token, refresh_token=refresh_token, user_id=user.id
-    )
+    auth = Auth(user_id=user.id)
+    auth.set_tokens(access_token, refresh_token)
     await auth.save(db)
 
+    if settings.STATELESS_TOKEN_VERIFICATION:
+        await revocation.cache_user(user)
+
     return AuthResponse(
         access_token=access_token,
         refresh_token=refresh_token,
@@ -109,7 +223,7 @@ async def generate_tokens(db: AsyncSession, user: User) -> AuthResponse:
                 + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
             ).timestamp()
         ),
-        user=UserResponse(**user.model_dump()),
+        user=UserResponse.from_row(user),
     )
 
 
@@ -119,12 +233,12 @@ async def regenerate_tokens(
     """Regenerate tokens using refresh token"""
     auth = await verify_token(db, refresh_token, "refresh")
     user = auth.user
+    await _revoke(*auth.tokens())
 
     access_token = create_token(auth.user.id, "access")
     refresh_token = create_token(auth.user.id, "refresh")
 
-    auth.access_token = access_token
-    auth.refresh_token = refresh_token
+    auth.set_tokens(access_token, refresh_token)
     await auth.save(db)
 
     auth = AuthResponse(
@@ -142,18 +256,22 @@ async def regenerate_tokens(
                 + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
             ).timestamp()
         ),
-        user=UserResponse(**user.model_dump()),
+        user=UserResponse.from_row(user),
     )
     return auth
 
 
 async def revoke_token(db: AsyncSession, token: str) -> None:
     """Revoke token"""
-    auth = await Auth.get(db, access_token=token)
+    auth = await Auth.get(
+        db, access_token_hash=revocation.token_digest(token)
+    )
     if auth:
+        await _revoke(*auth.tokens())
         await auth.delete(db)
     else:
         raise HTTPException(
             status_code=401,
             detail="Cannot sign out: Invalid or expired session.",
         )
+
@@ -0,0 +1,98 @@
+import secrets
+from hashlib import sha256
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.redis import redis_client
+
+OTP_PREFIX = "auth:otp:"
+EMAIL_THROTTLE_PREFIX = "auth:otp-requests:email:"
+IP_THROTTLE_PREFIX = "auth:otp-requests:ip:"
+
+# Counts the attempt and checks the code in one step, so concurrent
+# guesses cannot exceed the attempt limit or reuse a consumed code
+_verify_script = redis_client.register_script(
+    """
+    if redis.call("EXISTS", KEYS[1]) == 0 then
+        return 0
+    end
+    local attempts = redis.call("HINCRBY", KEYS[1], "attempts", 1)
+    local limit = tonumber(ARGV[2])
+    if attempts <= limit and redis.call("HGET", KEYS[1], "otp") == ARGV[1] then
+        redis.call("DEL", KEYS[1])
+        return 1
+    end
+    if attempts >= limit then
+        redis.call("DEL", KEYS[1])
+    end
+    return 0
+    """
+)
+
+
+def _email_digest(email: str) -> str:
+    return sha256(email.strip().lower().encode()).hexdigest()
+
+
+async def issue(email: str) -> str:
+    """
+    Generate a code for email, replacing any pending one
+    The code expires on its own after OTP_EXPIRE_MINUTES
+    """
+    otp = "".join(secrets.choice("0123456789") for _ in range(6))
+    key = OTP_PREFIX + _email_digest(email)
+    async with redis_client.pipeline(transaction=True) as pipe:
+        pipe.delete(key)
+        pipe.hset(key, mapping={"otp": otp, "attempts": 0})
+        pipe.expire(key, settings.OTP_EXPIRE_MINUTES * 60)
+        await pipe.execute()
+    return otp
+
+
+async def verify(email: str, otp: str) -> bool:
+    """
+    Check a submitted code; a correct code is consumed, and the pending
+    code is discarded once OTP_MAX_ATTEMPTS wrong guesses are made
+    """
+    return bool(
+        await _verify_script(
+            keys=[OTP_PREFIX + _email_digest(email)],
+            args=[otp, settings.OTP_MAX_ATTEMPTS]
+        )
+    )
+
+
+async def throttle(email: str, ip: Optional[str]) -> Optional[int]:
+    """
+    Count an OTP request against the per-email and per-IP limits
+    Returns the seconds until the caller may retry when a limit is hit,
+    otherwise None. Requests are let through when Redis is unavailable
+    """
+    window = settings.OTP_REQUEST_WINDOW_SECONDS
+    limits = [
+        (
+            EMAIL_THROTTLE_PREFIX + _email_digest(email),
+            settings.OTP_REQUESTS_PER_EMAIL,
+        )
+    ]
+    if ip:
+        limits.append((IP_THROTTLE_PREFIX + ip, settings.OTP_REQUESTS_PER_IP))
+
+    try:
+        async with redis_client.pipeline(transaction=True) as pipe:
+            for key, _ in limits:
+                pipe.incr(key)
+                pipe.expire(key, window, nx=True)
+                pipe.ttl(key)
+            results = await pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Could not check OTP request limits: {e}")
+        return None
+
+    for (_, limit), count, ttl in zip(limits, results[0::3], results[2::3]):
+        if count > limit:
+            return max(ttl, 1)
+    return None
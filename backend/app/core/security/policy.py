@@ -0,0 +1,34 @@
+from pathlib import Path
+from typing import Dict, FrozenSet, Optional, Tuple
+
+import yaml
+
+POLICY_FILE = Path(__file__).parent / "policy.yml"
+
+
+class LocalPolicy:
+    """
+    In-process role x action x resource evaluator
+    Roles come from the user row on every check; Permit is kept in step by
+    background reconciliation only
+    """
+
+    def __init__(self, rules: Dict[str, Dict[str, list[str]]]) -> None:
+        self._grants: FrozenSet[Tuple[str, str, str]] = frozenset(
+            (role, action, resource)
+            for role, resources in rules.items()
+            for resource, actions in (resources or {}).items()
+            for action in actions
+        )
+
+    @classmethod
+    def from_file(cls, path: str | Path = POLICY_FILE) -> "LocalPolicy":
+        with open(path, "r") as f:
+            return cls(yaml.safe_load(f) or {})
+
+    def is_allowed(
+        self, role: Optional[str], action: str, resource: str
+    ) -> bool:
+        if role is None:
+            return False
+        return (role, action, resource) in self._grants
@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta, timezone
+from hashlib import sha256
+from typing import Optional
+
+import jwt
+from pydantic import ValidationError
+from redis.exceptions import RedisError
+
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.redis import redis_client
+from app.models.user import User
+from app.schemas.user import UserResponse
+
+REVOKED_PREFIX = "auth:revoked:"
+USER_PREFIX = "auth:user:"
+SUSPENDED_PREFIX = "auth:suspended:"
+
+
+def token_digest(token: str) -> str:
+    """Fixed-width key for a token so Redis keys stay small"""
+    return sha256(token.encode()).hexdigest()
+
+
+def token_expiry(token: str) -> datetime:
+    """When a token expires, or the longest token lifetime if it has no exp"""
+    try:
+        payload = jwt.decode(  # type: ignore
+            token,
+            settings.SECRET_KEY,
+            algorithms=["HS256"],
+            options={"verify_exp": False},
+        )
+        return datetime.fromtimestamp(payload["exp"], timezone.utc)
+    except (jwt.InvalidTokenError, KeyError):
+        return datetime.now(timezone.utc) + timedelta(
+            days=settings.REFRESH_TOKEN_EXPIRE_DAYS
+        )
+
+
+async def revoke(*tokens: tuple[str, datetime]) -> None:
+    """
+    Add (digest, expires_at) token entries to the revocation set until the
+    tokens would have expired
+    Raises RedisError when the entries could not be written, since stateless
+    verification would otherwise keep accepting the tokens
+    """
+    now = datetime.now(timezone.utc)
+    async with redis_client.pipeline() as pipe:
+        for digest, expires_at in tokens:
+            remaining = int((expires_at - now).total_seconds())
+            pipe.set(REVOKED_PREFIX + digest, 1, ex=max(remaining, 1))
+        await pipe.execute()
+
+
+async def set_suspended(user_id: str, suspended: bool) -> None:
+    """
+    Add a user to or remove them from the suspension set and drop their
+    snapshot. Entries outlive any snapshot written before the suspension,
+    so a request racing it cannot restore stateless access. Raises
+    RedisError like revoke
+    """
+    async with redis_client.pipeline() as pipe:
+        if suspended:
+            pipe.set(
+                SUSPENDED_PREFIX + user_id,
+                1,
+                ex=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+            )
+        else:
+            pipe.delete(SUSPENDED_PREFIX + user_id)
+        pipe.delete(USER_PREFIX + user_id)
+        await pipe.execute()
+
+
+async def forget_user(user_id: str) -> None:
+    """
+    Drop a user snapshot so the next request reloads the user from the
+    database. Raises RedisError like revoke
+    """
+    await redis_client.delete(USER_PREFIX + user_id)
+
+
+async def cache_user(user: User) -> None:
+    """Store a user snapshot for stateless verification"""
+    try:
+        await redis_client.set(
+            USER_PREFIX + user.id,
+            UserResponse.from_row(user).model_dump_json(),
+            ex=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+        )
+    except RedisError as e:
+        logger.warning(f"Could not cache user snapshot: {e}")
+
+
+async def lookup(
+    token: str, user_id: str
+) -> tuple[bool, bool, Optional[User]]:
+    """
+    Check the revocation and suspension sets and load the user snapshot in
+    a single round trip. Returns (revoked, suspended, cached_user); raises
+    RedisError when Redis is unavailable so callers can fall back to the
+    database
+    """
+    async with redis_client.pipeline() as pipe:
+        pipe.exists(REVOKED_PREFIX + token_digest(token))
+        pipe.exists(SUSPENDED_PREFIX + user_id)
+        pipe.get(USER_PREFIX + user_id)
+        revoked, suspended, snapshot = await pipe.execute()
+
+    user = None
+    if snapshot:
+        try:
+            user = User(
+                **UserResponse.model_validate_json(snapshot).model_dump()
+            )
+        except ValidationError as e:
+            # Written by an older schema or corrupted; reload from the
+            # database, which caches a fresh snapshot
+            logger.warning(f"Discarding invalid user snapshot: {e}")
+            await redis_client.delete(USER_PREFIX + user_id)
+    return bool(revoked), bool(suspended), user
@@ -0,0 +1,88 @@
+import asyncio
+from email.message import Message
+
+import aiosmtplib
+from fastapi_mail import ConnectionConfig
+
+from app.core.logging import logger
+
+
+class PooledConnection:
+    def __init__(self, smtp: aiosmtplib.SMTP) -> None:
+        self.smtp = smtp
+        self.sent = 0
+
+
+class SMTPPool:
+    """
+    Bounded pool of authenticated SMTP connections
+    Connections are reused across sends, retired after max_messages and
+    replaced transparently when the server drops them. A connection a send
+    failed on for any other reason is closed rather than reused
+    """
+
+    def __init__(
+        self, config: ConnectionConfig, size: int, max_messages: int
+    ) -> None:
+        self.config = config
+        self.max_messages = max_messages
+        self._slots = asyncio.Semaphore(size)
+        self._idle: list[PooledConnection] = []
+
+    async def _connect(self) -> PooledConnection:
+        smtp = aiosmtplib.SMTP(
+            hostname=self.config.MAIL_SERVER,
+            port=self.config.MAIL_PORT,
+            timeout=self.config.TIMEOUT,
+            use_tls=self.config.MAIL_SSL_TLS,
+            start_tls=self.config.MAIL_STARTTLS,
+            validate_certs=self.config.VALIDATE_CERTS,
+        )
+        await smtp.connect()
+        if self.config.USE_CREDENTIALS:
+            await smtp.login(
+                self.config.MAIL_USERNAME,
+                self.config.MAIL_PASSWORD.get_secret_value(),
+            )
+        return PooledConnection(smtp)
+
+    @staticmethod
+    async def _discard(connection: PooledConnection) -> None:
+        try:
+            if connection.smtp.is_connected:
+                await connection.smtp.quit()
+        except aiosmtplib.SMTPException:
+            connection.smtp.close()
+
+    async def send(self, message: Message) -> None:
+        async with self._slots:
+            connection = self._idle.pop() if self._idle else None
+            try:
+                for attempt in range(2):
+                    if connection is None or not connection.smtp.is_connected:
+                        connection = await self._connect()
+                    try:
+                        await connection.smtp.send_message(message)
+                        break
+                    except aiosmtplib.SMTPServerDisconnected:
+                        # Stale pooled connection, reconnect and retry once
+                        connection = None
+                        if attempt:
+                            raise
+                        logger.info("SMTP connection dropped, reconnecting")
+            except BaseException:
+                # It may be mid-transaction, so it never goes back
+                if connection is not None:
+                    connection.smtp.close()
+                raise
+
+            connection.sent += 1
+            if connection.sent >= self.max_messages:
+                await self._discard(connection)
+            else:
+                self._idle.append(connection)
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            await self._discard(connection)
@@ -1,15 +1,140 @@
+import enum
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional, TypeVar
-from uuid import uuid4
+from decimal import Decimal
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    List,
+    Literal,
+    Optional,
+    Sequence,
+    TypeVar,
+)
+from uuid import UUID, uuid4
 
-from sqlalchemy import DateTime, String, and_, func, inspect, or_, select
+from sqlalchemy import (
+    DateTime,
+    String,
+    and_,
+    cast,
+    event,
+    func,
+    insert,
+    inspect,
+    or_,
+    select,
+    tuple_,
+)
+from sqlalchemy.dialects.postgresql import REGCONFIG
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import Mapped, mapped_column, selectinload
+from sqlalchemy.orm import (
+    Load,
+    Mapped,
+    Session,
+    load_only,
+    mapped_column,
+    raiseload,
+)
 
-from app.core.database import Base
+from app.core.cache import (
+    get_cached_total,
+    set_cached_total,
+    total_signature,
+)
+from app.core.config import settings
+from app.core.database import (
+    WRITTEN_TABLES,
+    Base,
+    Explain,
+    commit,
+    in_unit_of_work,
+    on_replica,
+)
 
 T = TypeVar("T", bound="BaseModel")
 
+# How get_all computes totals: a separate count(*), a count(*) OVER ()
+# window on the page query, or the planner estimate for large results
+COUNT_EXACT = "exact"
+COUNT_WINDOW = "window"
+COUNT_ESTIMATED = "estimated"
+CountMode = Literal["exact", "window", "estimated"]
+
+# Text search configuration and the pseudo sort key ordering by rank
+SEARCH_CONFIG = "english"
+RELEVANCE = "relevance"
+
+# Relationship loading strategies of a load plan, which maps relationship
+# paths such as "items" or "items.product" to how they are loaded.
+# Relationships a plan does not name raise on access instead of lazy-loading
+JOINED = "joined"
+SELECTIN = "selectin"
+NOLOAD = "none"
+LoadStrategy = Literal["joined", "selectin", "none"]
+LoadPlan = Dict[str, LoadStrategy]
+
+_LOADERS = {
+    JOINED: "joinedload",
+    SELECTIN: "selectinload",
+    NOLOAD: "raiseload",
+}
+
+# Comparison lookups accepted in get_all predicates as "<attr>__<op>"
+OPERATORS: Dict[str, Callable[[Any, Any], Any]] = {
+    "eq": lambda column, value: column == value,
+    "ne": lambda column, value: column != value,
+    "gt": lambda column, value: column > value,
+    "gte": lambda column, value: column >= value,
+    "lt": lambda column, value: column < value,
+    "lte": lambda column, value: column <= value,
+    "in": lambda column, value: column.in_(value),
+    "between": lambda column, value: column.between(*value),
+}
+
+
+# Raised while decoding a malformed or tampered cursor
+_CURSOR_ERRORS = (
+    ArithmeticError,
+    KeyError,
+    NotImplementedError,
+    TypeError,
+    ValueError,
+)
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, enum.Enum):
+        return value.name
+    if isinstance(value, (Decimal, UUID)):
+        return str(value)
+    return value
+
+
+def _decode_value(column: Any, value: Any) -> Any:
+    """Cursor value back as the column's Python type; raises when it is not"""
+    if value is None:
+        return None
+    python_type = column.type.python_type
+    if issubclass(python_type, datetime):
+        return datetime.fromisoformat(value)
+    if issubclass(python_type, enum.Enum):
+        return python_type[value]
+    if issubclass(python_type, (Decimal, UUID)):
+        if not isinstance(value, str):
+            raise TypeError(f"Expected a {python_type.__name__} string")
+        return python_type(value)
+    if python_type is float and type(value) is int:
+        return float(value)
+    if not isinstance(value, python_type):
+        raise TypeError(f"Expected a {python_type.__name__}")
+    return value
+
 
 class BaseModel(Base):
     __abstract__ = True
@@ -30,12 +155,18 @@ class BaseModel(Base):
         self, include_relationships: bool = False
     ) -> dict[str, Any]:
         result = {
-            c.name: getattr(self, c.name) for c in self.__table__.columns
+            c.name: getattr(self, c.name)
+            for c in self.__table__.columns
+            if c.computed is None
         }
 
         if include_relationships:
+            # Relationships outside the query's load plan are left out
+            unloaded = inspect(self).unloaded
             for relationship in self.__mapper__.relationships:
                 rel_name = relationship.key
+                if rel_name in unloaded:
+                    continue
                 rel_value = getattr(self, rel_name)
 
                 if rel_value is not None:
@@ -51,24 +182,178 @@ class BaseModel(Base):
 
         return result
 
+    def cursor(
+        self, sort_by: Optional[str], descending: bool = False
+    ) -> Optional[str]:
+        """Opaque keyset cursor pointing just after this row"""
+        if sort_by == RELEVANCE:
+            return None
+        value = getattr(self, sort_by) if sort_by else None
+        payload = [sort_by, descending, _encode_value(value), self.id]
+        return urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    @classmethod
+    def _keyset_condition(
+        cls, cursor: str, sort_by: Optional[str], descending: bool
+    ) -> Any:
+        """WHERE clause for the rows after the cursor in (sort_by, id) order"""
+        try:
+            payload = json.loads(urlsafe_b64decode(cursor.encode()))
+            if not isinstance(payload, list):
+                raise TypeError("Expected a list")
+            cursor_sort_by, cursor_descending, value, last_id = payload
+            if not isinstance(last_id, str):
+                raise TypeError("Expected a string id")
+        except _CURSOR_ERRORS:
+            raise ValueError("Invalid pagination cursor") from None
+
+        if cursor_sort_by != sort_by or cursor_descending != descending:
+            raise ValueError(
+                "Pagination cursor does not match the requested sort order"
+            )
+
+        if not sort_by:
+            return cls.id < last_id if descending else cls.id > last_id
+
+        column = getattr(cls, sort_by)
+        try:
+            value = _decode_value(column, value)
+        except _CURSOR_ERRORS:
+            raise ValueError("Invalid pagination cursor") from None
+
+        # NULLs sort last ascending and first descending (Postgres default)
+        if value is None:
+            if descending:
+                return or_(
+                    column.is_not(None),
+                    and_(column.is_(None), cls.id < last_id),
+                )
+            return and_(column.is_(None), cls.id > last_id)
+
+        if descending:
+            return tuple_(column, cls.id) < tuple_(value, last_id)
+        return or_(
+            tuple_(column, cls.id) > tuple_(value, last_id),
+            column.is_(None),
+        )
+
+    @classmethod
+    def _predicate_conditions(cls, predicates: Dict[str, Any]) -> List[Any]:
+        """Compile {"price__gte": 10, "status__in": [...]} into SQL clauses"""
+        conditions: List[Any] = []
+        for key, value in predicates.items():
+            attr, _, op = key.partition("__")
+            op = op or "eq"
+            if not hasattr(cls, attr):
+                raise ValueError(f"Invalid filter attribute: {attr}")
+            if op not in OPERATORS:
+                raise ValueError(f"Invalid filter operator: {op}")
+            if op == "between" and len(value) != 2:
+                raise ValueError(f"Filter {key} expects two values")
+            conditions.append(OPERATORS[op](getattr(cls, attr), value))
+        return conditions
+
+    @classmethod
+    def _load_options(cls, plan: Optional[LoadPlan]) -> List[Any]:
+        """
+        Loader options for a load plan; every relationship the plan does
+        not name, at any depth, raises when accessed
+        """
+        options: List[Any] = []
+        for path, strategy in (plan or {}).items():
+            if strategy not in _LOADERS:
+                raise ValueError(f"Invalid load strategy: {strategy}")
+
+            loader: Any = Load(cls)
+            model: Any = cls
+            keys = path.split(".")
+            for depth, key in enumerate(keys, 1):
+                relationship = inspect(model).relationships.get(key)
+                step = plan.get(".".join(keys[:depth]))  # type: ignore
+                if relationship is None or step is None:
+                    raise ValueError(f"Invalid relationship path: {path}")
+                loader = getattr(loader, _LOADERS[step])(getattr(model, key))
+                model = relationship.mapper.class_
+
+            if strategy != NOLOAD:
+                loader = loader.raiseload("*", sql_only=True)
+            options.append(loader)
+
+        # Relationships already in the identity map are still allowed
+        options.append(raiseload("*", sql_only=True))
+        return options
+
+    @classmethod
+    def _projection(
+        cls, columns: Optional[Iterable[str]], *required: str
+    ) -> List[Any]:
+        """
+        load_only option selecting just the named columns plus id and any
+        required ones; relationship names are left to the load plan and
+        the other columns raise if accessed
+        """
+        if columns is None:
+            return []
+
+        mapper = inspect(cls)
+        names = {"id", *required}
+        for name in columns:
+            if name in mapper.relationships:
+                continue
+            if name not in mapper.column_attrs:
+                raise ValueError(f"Invalid column: {name}")
+            names.add(name)
+        attrs = [
+            getattr(cls, name) for name in names if name in mapper.column_attrs
+        ]
+        return [load_only(*attrs, raiseload=True)]
+
     @classmethod
     async def get(
         cls: type[T],
         db: AsyncSession,
-        load_relationships: bool = False,
+        load: Optional[LoadPlan] = None,
+        columns: Optional[Iterable[str]] = None,
         **filters: Any,
     ) -> T | None:
-        query = select(cls)
-
-        if load_relationships:
-            query = query.options(selectinload("*"))
+        query = select(cls).options(
+            *cls._load_options(load), *cls._projection(columns)
+        )
 
         for attr, value in filters.items():
             if hasattr(cls, attr):
                 query = query.where(getattr(cls, attr) == value)
 
         result = await db.execute(query)
-        return result.scalar_one_or_none()
+        return result.unique().scalar_one_or_none()
+
+    @classmethod
+    async def get_many(
+        cls: type[T], db: AsyncSession, ids: Iterable[str]
+    ) -> List[T]:
+        """Fetch every row whose id is in ids with a single IN query"""
+        ids = list(set(ids))
+        if not ids:
+            return []
+
+        result = await db.execute(select(cls).where(cls.id.in_(ids)))
+        return list(result.scalars().all())
+
+    @classmethod
+    async def _count(cls, db: AsyncSession, conditions: List[Any]) -> int:
+        query = select(func.count()).select_from(cls).where(*conditions)
+        return (await db.execute(query)).scalar_one()
+
+    @classmethod
+    async def _estimate_count(
+        cls, db: AsyncSession, conditions: List[Any]
+    ) -> int:
+        """Planner row estimate, avoids scanning very large tables"""
+        query = select(cls.id).where(*conditions)
+        plan = (await db.execute(Explain(query))).scalar_one()
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
 
     @classmethod
     async def get_all(
@@ -81,19 +366,20 @@ class BaseModel(Base):
         use_or: bool = True,
         filters: Optional[Dict[str, Any]] = None,
         search: Optional[str] = None,
-        load_relationships: bool = False,
+        load: Optional[LoadPlan] = None,
+        columns: Optional[Iterable[str]] = None,
+        cursor: Optional[str] = None,
+        predicates: Optional[Dict[str, Any]] = None,
+        count: CountMode = COUNT_EXACT,
+        cache_total: bool = False,
     ) -> tuple[List[T], int]:
         skip = (page - 1) * size
-        query = select(cls)
+        # The sort column is always loaded so the next cursor can be built
+        query = select(cls).options(
+            *cls._load_options(load),
+            *cls._projection(columns, *([sort_by] if sort_by else [])),
+        )
         conditions: List[Any] = []
-
-        if load_relationships:
-            mapper = inspect(cls)
-            relationship_options = [
-                selectinload(getattr(cls, rel.key))
-                for rel in mapper.relationships
-            ]
-            query = query.options(*relationship_options)
         if filters:
             filter_conditions: List[Any] = []
             for attr, value in filters.items():
@@ -108,7 +394,21 @@ class BaseModel(Base):
                     else and_(*filter_conditions)
                 )
 
-        if search:
+        if predicates:
+            # Range/comparison predicates always narrow the result
+            conditions.extend(cls._predicate_conditions(predicates))
+
+        search_rank = None
+        search_vector = getattr(cls, "SEARCH_VECTOR", None)
+        if search and search_vector:
+            # Full-text search on the indexed tsvector column
+            vector = getattr(cls, search_vector)
+            tsquery = func.websearch_to_tsquery(
+                cast(SEARCH_CONFIG, REGCONFIG), search
+            )
+            conditions.append(vector.op("@@")(tsquery))
+            search_rank = func.ts_rank(vector, tsquery)
+        elif search:
             search_fields = getattr(cls, "SEARCH_FIELDS", [])
             if search_fields:
                 search_conditions: List[Any] = []
@@ -126,45 +426,144 @@ class BaseModel(Base):
             for condition in conditions:
                 query = query.where(condition)
 
-        # Count total before pagination
-        count_query = select(func.count())
-        if query.whereclause is not None:
-            if hasattr(query.whereclause, "clauses"):
-                count_query = count_query.select_from(
-                    select(cls).where(*query.whereclause.clauses).subquery()
-                )
-            else:
-                count_query = count_query.select_from(
-                    select(cls).where(query.whereclause).subquery()
-                )
-        else:
-            count_query = count_query.select_from(select(cls).subquery())
+        # Keyset pages only see rows after the cursor, so a window count
+        # over them would not be the total
+        if count == COUNT_WINDOW and cursor is not None:
+            count = COUNT_EXACT
+
+        total: Optional[int] = None
+        version: Optional[int] = None
+        signature = ""
+        cache_total = cache_total and settings.COUNT_CACHE_TTL > 0
+        if cache_total:
+            signature = total_signature(
+                [filters, use_or, predicates, search]
+            )
+            total, version = await get_cached_total(
+                cls.__tablename__, signature
+            )
+        cached = total is not None
 
-        count_result = await db.execute(count_query)
-        total = count_result.scalar_one()
+        if total is None and count == COUNT_ESTIMATED:
+            total = await cls._estimate_count(db, conditions)
+            if total < settings.ESTIMATED_COUNT_THRESHOLD:
+                total = None
 
-        if sort_by:
+        if total is None and count != COUNT_WINDOW:
+            total = await cls._count(db, conditions)
+
+        if sort_by == RELEVANCE:
+            if search_rank is None:
+                raise ValueError("Sorting by relevance requires a search")
+            if cursor is not None:
+                raise ValueError("Cursor pagination cannot sort by relevance")
+            query = query.order_by(search_rank.desc())
+        elif sort_by:
             if not hasattr(cls, sort_by):
                 raise ValueError(f"Invalid sort attribute: {sort_by}")
             order_attr = getattr(cls, sort_by)
             query = query.order_by(
-                order_attr.desc() if descending else order_attr
+                order_attr.desc().nulls_first()
+                if descending
+                else order_attr.asc().nulls_last()
             )
 
-        query = query.offset(skip).limit(size)
-        result = await db.execute(query)
-        data = list(result.scalars().all())
+        # id as tie-breaker keeps the order total so cursors are stable
+        query = query.order_by(cls.id.desc() if descending else cls.id)
+
+        if cursor is not None:
+            # Keyset mode: seek past the cursor instead of using OFFSET
+            query = query.where(
+                cls._keyset_condition(cursor, sort_by, descending)
+            )
+        else:
+            query = query.offset(skip)
+
+        query = query.limit(size)
+        if total is None:
+            # Window count: total comes back with the page in one query
+            query = query.add_columns(func.count().over())
+            rows = (await db.execute(query)).unique().all()
+            data = [row[0] for row in rows]
+            if rows:
+                total = rows[0][1]
+            else:
+                total = 0 if skip == 0 else await cls._count(db, conditions)
+        else:
+            result = await db.execute(query)
+            data = list(result.unique().scalars().all())
+
+        if cache_total and not cached:
+            await set_cached_total(
+                cls.__tablename__, signature, total, version, on_replica(db)
+            )
 
         return (data, total)
 
     async def save(self: T, db: AsyncSession) -> T:
         if not self.id:
             db.add(self)
-        await db.commit()
+        if in_unit_of_work(db):
+            # Column defaults are client-side, so the flush fills them in
+            await db.flush()
+            return self
+        await commit(db)
         await db.refresh(self)
         return self
 
     async def delete(self, db: AsyncSession) -> bool:
         await db.delete(self)
-        await db.commit()
+        if in_unit_of_work(db):
+            await db.flush()
+        else:
+            await commit(db)
         return True
+
+    @classmethod
+    async def bulk_save(
+        cls: type[T], db: AsyncSession, instances: Sequence[T]
+    ) -> List[T]:
+        """
+        Persist new and modified instances in a single flush
+        Rows are batched into executemany INSERTs/UPDATEs and not refreshed
+        """
+        db.add_all(instances)
+        if in_unit_of_work(db):
+            await db.flush()
+        else:
+            await commit(db)
+        return list(instances)
+
+    @classmethod
+    async def bulk_insert(
+        cls: type[T], db: AsyncSession, rows: Sequence[Dict[str, Any]]
+    ) -> List[T]:
+        """
+        Insert rows with batched INSERT ... RETURNING and return them as
+        instances without a refresh per row
+        """
+        if not rows:
+            return []
+
+        result = await db.scalars(insert(cls).returning(cls), list(rows))
+        instances = list(result.all())
+        # Core inserts bypass the flush hooks that track written tables
+        db.info.setdefault(WRITTEN_TABLES, set()).add(cls.__tablename__)
+        db.info["wrote"] = True
+        if not in_unit_of_work(db):
+            await commit(db)
+        return instances
+
+
+@event.listens_for(Session, "after_flush")
+def _track_written_tables(session: Session, _: Any) -> None:
+    """Collect the tables whose cached totals commit() drops"""
+    tables = session.info.setdefault(WRITTEN_TABLES, set())
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, BaseModel):
+            tables.add(obj.__tablename__)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_written_tables(session: Session) -> None:
+    session.info.pop(WRITTEN_TABLES, None)
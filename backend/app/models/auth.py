@@ -1,17 +1,60 @@
-from sqlalchemy import ForeignKey, String
+from datetime import datetime
+
+from sqlalchemy import DateTime, ForeignKey, Index, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
+from app.core.security.revocation import token_digest, token_expiry
 from app.models import BaseModel
 from app.models.user import User
 
 
 class Auth(BaseModel):
     __tablename__ = "auth_sessions"
+    __table_args__ = (
+        # Sessions are looked up by fixed-width token digests
+        Index(
+            "ix_auth_sessions_access_token_hash",
+            "access_token_hash",
+            unique=True,
+        ),
+        Index(
+            "ix_auth_sessions_refresh_token_hash",
+            "refresh_token_hash",
+            unique=True,
+        ),
+        Index("ix_auth_sessions_user_id", "user_id"),
+        # Lets the reaper find expired sessions without a table scan
+        Index("ix_auth_sessions_updated_at", "updated_at"),
+    )
 
     user_id: Mapped[str] = mapped_column(
         ForeignKey("users.id"), nullable=False
     )
-    access_token: Mapped[str] = mapped_column(String(500), nullable=False)
-    refresh_token: Mapped[str] = mapped_column(String(500), nullable=False)
+    # Only digests are stored, so a leaked table yields no usable tokens.
+    # The expiries are what revocation entries need to outlive the tokens
+    access_token_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    refresh_token_hash: Mapped[str] = mapped_column(
+        String(64), nullable=False
+    )
+    access_token_expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
+    refresh_token_expires_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), nullable=False
+    )
 
     user: Mapped[User] = relationship(User, back_populates="auth_sessions")
+
+    def set_tokens(self, access_token: str, refresh_token: str) -> None:
+        """Point the session at a new token pair"""
+        self.access_token_hash = token_digest(access_token)
+        self.refresh_token_hash = token_digest(refresh_token)
+        self.access_token_expires_at = token_expiry(access_token)
+        self.refresh_token_expires_at = token_expiry(refresh_token)
+
+    def tokens(self) -> list[tuple[str, datetime]]:
+        """Digest and expiry of the session's current tokens"""
+        return [
+            (self.access_token_hash, self.access_token_expires_at),
+            (self.refresh_token_hash, self.refresh_token_expires_at),
+        ]
@@ -2,7 +2,7 @@ import enum
 from typing import List
 
 from sqlalchemy import Enum as SQLEnum
-from sqlalchemy import Float, ForeignKey, Integer, String
+from sqlalchemy import Float, ForeignKey, Index, Integer, String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.models import BaseModel
@@ -19,6 +19,7 @@ class OrderStatus(enum.Enum):
 
 class OrderItem(BaseModel):
     __tablename__ = "order_items"
+    __table_args__ = (Index("ix_order_items_order_id", "order_id"),)
 
     order_id: Mapped[str] = mapped_column(
         ForeignKey("orders.id"), nullable=False
@@ -37,6 +38,12 @@ class OrderItem(BaseModel):
 
 class Order(BaseModel):
     __tablename__ = "orders"
+    __table_args__ = (
+        # Customers list their own orders, admins filter by status
+        Index("ix_orders_user_id_created_at", "user_id", "created_at", "id"),
+        Index("ix_orders_status_created_at", "status", "created_at", "id"),
+        Index("ix_orders_created_at_id", "created_at", "id"),
+    )
 
     user_id: Mapped[str] = mapped_column(
         ForeignKey("users.id"), nullable=False
@@ -1,13 +1,41 @@
 from typing import List, Optional
 
-from sqlalchemy import ARRAY, Boolean, Float, String
+from sqlalchemy import ARRAY, Boolean, Computed, Float, Index, String
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column
 
-from app.models import BaseModel
+from app.models import SEARCH_CONFIG, BaseModel
+
+
+# Built on the configuration get_all searches with, so the GIN index always
+# matches the query. Migrations keep their own copy of the expression
+SEARCH_VECTOR_EXPRESSION = (
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(title, '')), 'A') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(category, '')), 'B') || "
+    f"setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(description, '')), 'C')"
+)
 
 
 class Product(BaseModel):
     __tablename__ = "products"
+    __table_args__ = (
+        Index(
+            "ix_products_search_vector",
+            "search_vector",
+            postgresql_using="gin",
+        ),
+        # get_all orders by the sort column then id, so each filter/sort
+        # shape gets a matching composite index
+        Index("ix_products_created_at_id", "created_at", "id"),
+        Index(
+            "ix_products_category_created_at", "category", "created_at", "id"
+        ),
+        Index(
+            "ix_products_featured_created_at", "featured", "created_at", "id"
+        ),
+        Index("ix_products_price_id", "price", "id"),
+        Index("ix_products_rating_id", "rating", "id"),
+    )
 
     title: Mapped[str] = mapped_column(String(100), nullable=False)
     description: Mapped[str] = mapped_column(String, nullable=False)
@@ -23,6 +51,13 @@ class Product(BaseModel):
         ARRAY(String), nullable=True
     )
 
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(SEARCH_VECTOR_EXPRESSION, persisted=True),
+        deferred=True,
+    )
+
     SEARCH_FIELDS = ["title", "description", "category"]
+    SEARCH_VECTOR = "search_vector"
 
 # missing counts in stock
\ No newline at end of file
@@ -1,15 +1,13 @@
 import enum
-import random
-from datetime import datetime, timedelta, timezone
 from typing import List, Optional, TYPE_CHECKING
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from sqlalchemy import Boolean, DateTime
+from sqlalchemy import Boolean
 from sqlalchemy import Enum as SQLEnum
 from sqlalchemy import String
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.email import send_email
+from app.core.security import otp
 from app.models import BaseModel
 
 if TYPE_CHECKING:
@@ -38,10 +36,6 @@ class User(BaseModel):
         SQLEnum(UserRole), nullable=False, default=UserRole.customer
     )
     is_suspended: Mapped[bool] = mapped_column(Boolean, default=False)
-    otp: Mapped[Optional[str]] = mapped_column(String(6), nullable=True)
-    otp_expires_at: Mapped[Optional[datetime]] = mapped_column(
-        DateTime(timezone=True), nullable=True
-    )
 
     # Relationships
     orders: Mapped[List["Order"]] = relationship(back_populates="user")
@@ -49,17 +43,10 @@ class User(BaseModel):
 
     SEARCH_FIELDS = ["email", "first_name", "last_name"]
 
-    async def send_otp(self, db: AsyncSession, is_new: bool = False) -> None:
+    async def send_otp(self, is_new: bool = False) -> None:
         """Send OTP Email for registration or sign in"""
 
-        otp = "".join(random.choices("0123456789", k=6))
-        print("OTP: ", otp)  # REMOVE
-
-        self.otp = otp
-        self.otp_expires_at = datetime.now(timezone.utc) + timedelta(
-            minutes=15
-        )
-        await self.save(db)
+        code = await otp.issue(self.email)
 
         if is_new:
             subject = "Welcome to Our Platform - Verify Your Account"
@@ -68,29 +55,12 @@ class User(BaseModel):
             subject = "Your OTP Code for Authentication"
             template_name = "sign-in.mjml"
 
-        send_email(
+        await send_email(
             subject=subject,
             email=self.email,
             template_name=template_name,
             context={
                 "first_name": self.first_name,
-                "otp": otp,
+                "otp": code,
             },
         )
-
-    async def verify_otp(self, db: AsyncSession, otp: str) -> bool:
-        """Verify the submitted OTP against the stored OTP"""
-        now = datetime.now(timezone.utc)
-
-        if (
-            self.otp is not None
-            and self.otp_expires_at is not None
-            and now < self.otp_expires_at
-            and self.otp == otp
-        ):
-            self.otp = None
-            self.otp_expires_at = None
-            await self.save(db)
-            return True
-
-        return False
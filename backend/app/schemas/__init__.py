@@ -1,8 +1,20 @@
-from typing import Generic, List, Optional, TypeVar
+from functools import lru_cache
+from typing import (
+    Any,
+    Callable,
+    ClassVar,
+    Generic,
+    List,
+    Optional,
+    TypeVar,
+    get_args,
+    get_origin,
+)
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, create_model
 
 T = TypeVar("T")
+R = TypeVar("R", bound="BaseResponse")
 
 
 class BaseRequest(BaseModel):
@@ -12,6 +24,116 @@ class BaseRequest(BaseModel):
 class BaseResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
+    _row_builder: ClassVar[Optional[Callable[[Any], Any]]] = None
+
+    @classmethod
+    def from_row(cls: type[R], row: Any) -> R:
+        """
+        Build the response straight from a trusted ORM row, skipping
+        validation, with a builder compiled once per response class
+        """
+        builder = cls.__dict__.get("_row_builder")
+        if builder is None:
+            builder = _compile_row_builder(cls)
+            cls._row_builder = builder
+        return builder(row)
+
+    @classmethod
+    def partial(cls: type[R], fields: Optional[str]) -> type[R]:
+        """
+        Response model restricted to a comma-separated sparse fieldset
+        id is always included; no fieldset returns the full model
+        """
+        if not fields:
+            return cls
+        names = {name.strip() for name in fields.split(",") if name.strip()}
+        invalid = names - cls.model_fields.keys()
+        if invalid:
+            raise ValueError(f"Invalid fields: {', '.join(sorted(invalid))}")
+        # Keep declaration order so the cache key and output are stable
+        selected = tuple(
+            name for name in cls.model_fields if name in names or name == "id"
+        )
+        return _partial_response(cls, selected)
+
+
+@lru_cache(maxsize=256)
+def _partial_response(cls: type[R], fields: tuple[str, ...]) -> type[R]:
+    return create_model(  # type: ignore
+        f"Partial{cls.__name__}",
+        __base__=BaseResponse,
+        **{
+            name: (cls.model_fields[name].annotation, cls.model_fields[name])
+            for name in fields
+        },
+    )
+
+
+def _nested_response(
+    annotation: Any,
+) -> tuple[Optional[type[BaseResponse]], bool]:
+    """Response class nested in an annotation and whether it is a list"""
+    if isinstance(annotation, type) and issubclass(annotation, BaseResponse):
+        return annotation, False
+    many = get_origin(annotation) in (list, List)
+    for arg in get_args(annotation):
+        nested, nested_many = _nested_response(arg)
+        if nested is not None:
+            return nested, many or nested_many
+    return None, False
+
+
+def _nested_converter(
+    nested: type[BaseResponse], many: bool
+) -> Callable[[Any], Any]:
+    def convert(value: Any) -> Any:
+        if value is None:
+            return None
+        if many:
+            return [nested.from_row(item) for item in value]
+        return nested.from_row(value)
+
+    return convert
+
+
+def _compile_row_builder(cls: type[R]) -> Callable[[Any], R]:
+    fields: List[tuple[str, Optional[Callable[[Any], Any]]]] = []
+    for name, field in cls.model_fields.items():
+        response, many = _nested_response(field.annotation)
+        fields.append(
+            (name, response and _nested_converter(response, many))
+        )
+
+    columns = frozenset(name for name, convert in fields if convert is None)
+    fields_set = set(cls.model_fields)
+    new = object.__new__
+    set_attr = object.__setattr__
+
+    def build(row: Any) -> R:
+        # Loaded column values live in the instance state; reading them
+        # directly skips the attribute instrumentation
+        state = row.__dict__
+        missing = columns - state.keys()
+        if missing:
+            # Expired or deferred attributes go through a regular load
+            state = {**state, **{name: getattr(row, name) for name in missing}}
+        values = {
+            name: (
+                state[name] if convert is None else convert(getattr(row, name))
+            )
+            for name, convert in fields
+        }
+
+        # Equivalent to model_construct without its per-field Python loop
+        response = new(cls)
+        set_attr(response, "__dict__", values)
+        set_attr(response, "__pydantic_fields_set__", fields_set)
+        set_attr(response, "__pydantic_extra__", None)
+        set_attr(response, "__pydantic_private__", None)
+        return response
+
+    return build
+
 
 class PaginatedRequest(BaseRequest):
     page: int = 1
@@ -20,6 +142,8 @@ class PaginatedRequest(BaseRequest):
     descending: bool = False
     use_or: bool = False
     search: Optional[str] = None
+    cursor: Optional[str] = None
+    fields: Optional[str] = None
 
 
 class PaginatedResponse(BaseResponse, Generic[T]):
@@ -27,3 +151,4 @@ class PaginatedResponse(BaseResponse, Generic[T]):
     total: int
     page: int
     pages: int
+    next_cursor: Optional[str] = None
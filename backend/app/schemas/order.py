@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from pydantic import Field
 from app.models.order import OrderStatus
 from app.schemas import BaseRequest, BaseResponse, PaginatedRequest
@@ -36,6 +36,21 @@ class OrderResponse(BaseResponse):
 
 class OrderPaginatedRequest(PaginatedRequest):
     status: Optional[OrderStatus] = None
+    min_total: Optional[float] = None
+    max_total: Optional[float] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+
+    def predicates(self) -> Dict[str, Any]:
+        """Status and range filters to be applied in SQL by get_all"""
+        predicates = {
+            "status__eq": self.status,
+            "total__gte": self.min_total,
+            "total__lte": self.max_total,
+            "created_at__gte": self.created_after,
+            "created_at__lte": self.created_before,
+        }
+        return {k: v for k, v in predicates.items() if v is not None}
 
 
 # This needs work like some field removed form order item and support for Update will be added later
\ No newline at end of file
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
 from app.schemas import BaseRequest, BaseResponse, PaginatedRequest
 
@@ -44,3 +44,12 @@ class ProductPaginatedRequest(PaginatedRequest):
     min_price: Optional[float] = None
     max_price: Optional[float] = None
     min_rating: Optional[float] = None
+
+    def predicates(self) -> Dict[str, Any]:
+        """Range filters to be applied in SQL by get_all"""
+        predicates = {
+            "price__gte": self.min_price,
+            "price__lte": self.max_price,
+            "rating__gte": self.min_rating,
+        }
+        return {k: v for k, v in predicates.items() if v is not None}
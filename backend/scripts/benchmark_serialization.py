@@ -0,0 +1,134 @@
+"""
+Compare the old and new rendering of a product page
+
+old: XResponse(**row.model_dump()) rows, FastAPI response_model
+     serialization and the stock JSONResponse (json.dumps)
+new: BaseResponse.from_row rows rendered by FastJSONResponse
+
+Usage: python -m scripts.benchmark_serialization [--size 100] [--runs 500]
+"""
+
+import argparse
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from timeit import timeit
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi import FastAPI  # noqa: E402
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.core.responses import FastJSONResponse  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.schemas import PaginatedResponse  # noqa: E402
+from app.schemas.product import ProductResponse  # noqa: E402
+
+Page = PaginatedResponse[ProductResponse]
+
+
+def make_products(size: int) -> list[Product]:
+    now = datetime.now(timezone.utc)
+    return [
+        Product(
+            id=str(uuid4()),
+            title=f"Product {i}",
+            description="A reasonably long product description " * 4,
+            price=19.99 + i,
+            discount_price=None,
+            image=f"https://cdn.baiyit.com/products/{i}.png",
+            rating=4.5,
+            category="electronics",
+            featured=i % 3 == 0,
+            specs=["spec one", "spec two", "spec three"],
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(size)
+    ]
+
+
+def old_page(products: list[Product]) -> Page:
+    return PaginatedResponse(
+        data=[ProductResponse(**p.model_dump()) for p in products],
+        total=len(products),
+        page=1,
+        pages=1,
+    )  # type: ignore
+
+
+def new_page(products: list[Product]) -> Page:
+    return Page(
+        data=[ProductResponse.from_row(p) for p in products],
+        total=len(products),
+        page=1,
+        pages=1,
+    )
+
+
+def build_app(products: list[Product]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/old", response_model=Page, response_class=JSONResponse)
+    async def old() -> Page:
+        return old_page(products)
+
+    @app.get("/new", response_model=Page, response_class=FastJSONResponse)
+    async def new() -> FastJSONResponse:
+        return FastJSONResponse(new_page(products))
+
+    return app
+
+
+def report(name: str, old: float, new: float, runs: int) -> None:
+    print(
+        f"{name:<12} old {old / runs * 1000:8.3f}ms  "
+        f"new {new / runs * 1000:8.3f}ms  x{old / new:5.1f}"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=100)
+    parser.add_argument("--runs", type=int, default=500)
+    args = parser.parse_args()
+
+    products = make_products(args.size)
+    page_old, page_new = old_page(products), new_page(products)
+    assert JSONResponse(
+        Page.model_validate(page_old).model_dump(mode="json")
+    ).body == JSONResponse(page_new.model_dump(mode="json")).body
+
+    print(f"{args.size} products per page, {args.runs} runs")
+    report(
+        "build",
+        timeit(lambda: old_page(products), number=args.runs),
+        timeit(lambda: new_page(products), number=args.runs),
+        args.runs,
+    )
+    report(
+        "render",
+        timeit(
+            lambda: JSONResponse(
+                Page.model_validate(page_old).model_dump(mode="json")
+            ),
+            number=args.runs,
+        ),
+        timeit(lambda: FastJSONResponse(page_new), number=args.runs),
+        args.runs,
+    )
+
+    client = TestClient(build_app(products))
+    assert client.get("/old").json() == client.get("/new").json()
+    report(
+        "end-to-end",
+        timeit(lambda: client.get("/old"), number=args.runs),
+        timeit(lambda: client.get("/new"), number=args.runs),
+        args.runs,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+"""
+Explain the queries behind each API route and flag sequential scans
+
+Each route's model calls run against DATABASE_URL in a transaction that is
+rolled back, with enable_seqscan off. The planner then avoids sequential
+scans whenever an index can serve the query, so any Seq Scan left in a
+plan marks a filter/sort shape without a usable index.
+
+Usage: python -m scripts.index_advisor [--analyze] [--verbose]
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Awaitable, Callable, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import event  # noqa: E402
+from sqlalchemy.ext.asyncio import (  # noqa: E402
+    AsyncConnection,
+    AsyncSession,
+)
+
+from app.api.order import ORDER_DETAIL_LOAD, ORDER_LIST_LOAD  # noqa: E402
+from app.core.database import engine  # noqa: E402
+from app.core.security.jwt import AUTH_LOAD  # noqa: E402
+from app.models import COUNT_WINDOW, RELEVANCE  # noqa: E402
+from app.models.auth import Auth  # noqa: E402
+from app.models.order import Order, OrderStatus  # noqa: E402
+from app.models.product import Product  # noqa: E402
+from app.models.user import User  # noqa: E402
+
+SAMPLE_ID = "00000000-0000-0000-0000-000000000000"
+SAMPLE_HASH = "0" * 64
+SAMPLE_CURSOR = Product(
+    id=SAMPLE_ID, created_at=datetime(2025, 1, 1, tzinfo=timezone.utc)
+).cursor("created_at", False)
+
+Scenario = Tuple[str, Callable[[AsyncSession], Awaitable[Any]]]
+
+# The model calls each route makes, with representative arguments. Eager
+# loads only show up once the tables have rows to load relationships for
+SCENARIOS: List[Scenario] = [
+    (
+        "GET /products",
+        lambda db: Product.get_all(
+            db, sort_by="created_at", count=COUNT_WINDOW
+        ),
+    ),
+    (
+        "GET /products?cursor=...",
+        lambda db: Product.get_all(
+            db, sort_by="created_at", cursor=SAMPLE_CURSOR
+        ),
+    ),
+    (
+        "GET /products?category=...",
+        lambda db: Product.get_all(
+            db,
+            sort_by="created_at",
+            filters={"category": "electronics"},
+            count=COUNT_WINDOW,
+        ),
+    ),
+    (
+        "GET /products?featured=true",
+        lambda db: Product.get_all(
+            db,
+            sort_by="created_at",
+            filters={"featured": True},
+            count=COUNT_WINDOW,
+        ),
+    ),
+    (
+        "GET /products?sort_by=price&min_price=...",
+        lambda db: Product.get_all(
+            db,
+            sort_by="price",
+            predicates={"price__gte": 10},
+            count=COUNT_WINDOW,
+        ),
+    ),
+    (
+        "GET /products?sort_by=rating&descending=true",
+        lambda db: Product.get_all(
+            db, sort_by="rating", descending=True, count=COUNT_WINDOW
+        ),
+    ),
+    (
+        "GET /products?search=...&sort_by=relevance",
+        lambda db: Product.get_all(
+            db, search="wireless headphones", sort_by=RELEVANCE
+        ),
+    ),
+    ("GET /products/{id}", lambda db: Product.get(db, id=SAMPLE_ID)),
+    (
+        "GET /orders (customer)",
+        lambda db: Order.get_all(
+            db,
+            sort_by="created_at",
+            filters={"user_id": SAMPLE_ID},
+            load=ORDER_LIST_LOAD,
+            count=COUNT_WINDOW,
+        ),
+    ),
+    (
+        "GET /orders?status=... (admin)",
+        lambda db: Order.get_all(
+            db,
+            sort_by="created_at",
+            predicates={"status__eq": OrderStatus.processing},
+            load=ORDER_LIST_LOAD,
+            count=COUNT_WINDOW,
+        ),
+    ),
+    (
+        "GET /orders/{id}",
+        lambda db: Order.get(
+            db, ORDER_DETAIL_LOAD, id=SAMPLE_ID, user_id=SAMPLE_ID
+        ),
+    ),
+    (
+        "access token verification",
+        lambda db: Auth.get(db, AUTH_LOAD, access_token_hash=SAMPLE_HASH),
+    ),
+    (
+        "POST /auth/refresh",
+        lambda db: Auth.get(db, AUTH_LOAD, refresh_token_hash=SAMPLE_HASH),
+    ),
+    (
+        "POST /auth/request-otp",
+        lambda db: User.get(db, email="user@baiyit.com"),
+    ),
+]
+
+
+def walk(plan: dict[str, Any]) -> List[dict[str, Any]]:
+    nodes = [plan]
+    for child in plan.get("Plans", []):
+        nodes.extend(walk(child))
+    return nodes
+
+
+async def capture(
+    connection: AsyncConnection, scenario: Scenario
+) -> List[Tuple[str, Any]]:
+    """Run a scenario and return the SQL statements it executed"""
+    statements: List[Tuple[str, Any]] = []
+
+    def record(*args: Any) -> None:
+        _, _, statement, parameters, _, _ = args
+        statements.append((statement, parameters))
+
+    sync_connection = connection.sync_connection
+    event.listen(sync_connection, "before_cursor_execute", record)
+    try:
+        async with AsyncSession(bind=connection) as db:
+            await scenario[1](db)
+    finally:
+        event.remove(sync_connection, "before_cursor_execute", record)
+    return statements
+
+
+async def advise(analyze: bool, verbose: bool) -> int:
+    options = "ANALYZE, FORMAT JSON" if analyze else "FORMAT JSON"
+    flagged = 0
+
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        try:
+            await connection.exec_driver_sql("SET LOCAL enable_seqscan = off")
+            for scenario in SCENARIOS:
+                route = scenario[0]
+                for statement, parameters in await capture(
+                    connection, scenario
+                ):
+                    result = await connection.exec_driver_sql(
+                        f"EXPLAIN ({options}) {statement}", parameters
+                    )
+                    plan = result.scalar_one()
+                    if isinstance(plan, str):
+                        plan = json.loads(plan)
+                    nodes = walk(plan[0]["Plan"])
+
+                    scans = sorted(
+                        {
+                            node["Relation Name"]
+                            for node in nodes
+                            if node["Node Type"] == "Seq Scan"
+                        }
+                    )
+                    sorts = [n for n in nodes if n["Node Type"] == "Sort"]
+                    cost = plan[0]["Plan"]["Total Cost"]
+
+                    if scans:
+                        flagged += 1
+                        print(f"SEQ SCAN  {route}: {', '.join(scans)}")
+                    elif verbose:
+                        print(f"ok        {route} (cost {cost})")
+                    if sorts and (scans or verbose):
+                        keys = ", ".join(sorts[0].get("Sort Key", []))
+                        print(f"          sorts on {keys}")
+                    if scans or verbose:
+                        print(f"          {' '.join(statement.split())}")
+        finally:
+            await transaction.rollback()
+    await engine.dispose()
+
+    print(
+        f"{flagged} statement(s) with sequential scans "
+        f"across {len(SCENARIOS)} routes"
+    )
+    return 1 if flagged else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--analyze",
+        action="store_true",
+        help="Use EXPLAIN ANALYZE (executes the queries)",
+    )
+    parser.add_argument(
+        "--verbose",
+        action="store_true",
+        help="Print every statement, not only flagged ones",
+    )
+    args = parser.parse_args()
+    sys.exit(asyncio.run(advise(args.analyze, args.verbose)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+from typing import AsyncIterator
+
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+
+from app.core.redis import redis_client
+
+
+@pytest.fixture
+def redis_server() -> FakeServer:
+    return FakeServer()
+
+
+@pytest.fixture
+async def redis(
+    redis_server: FakeServer, monkeypatch: pytest.MonkeyPatch
+) -> AsyncIterator[FakeAsyncRedis]:
+    """
+    In-memory Redis behind the shared client, with Lua support from lupa
+    Registered scripts and every module using redis_client talk to it
+    """
+    fake = FakeAsyncRedis(server=redis_server)
+    monkeypatch.setattr(redis_client, "connection_pool", fake.connection_pool)
+    yield fake
+    await fake.aclose()
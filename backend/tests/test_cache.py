@@ -0,0 +1,32 @@
+from app.core.cache import TTLCache
+
+
+def test_ttl_cache_counts_hits_misses_and_evictions():
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=60)
+
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.stats() == {
+        "size": 2,
+        "maxsize": 2,
+        "ttl": 60,
+        "hits": 1,
+        "misses": 2,
+        "evictions": 1,
+    }
+
+
+def test_ttl_cache_expires_entries(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.core.cache.monotonic", lambda: now[0])
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=5)
+    cache.set("a", 1)
+
+    now[0] += 5
+    assert cache.get("a") is None
+    assert len(cache) == 0
@@ -0,0 +1,101 @@
+import json
+from base64 import urlsafe_b64encode
+from datetime import datetime, timezone
+from decimal import Decimal
+from uuid import uuid4
+
+import pytest
+from sqlalchemy import Numeric, Uuid, column
+from sqlalchemy.dialects import postgresql
+
+from app.models import _decode_value, _encode_value
+from app.models.order import Order, OrderStatus
+from app.models.product import Product
+
+
+def _cursor(payload: object) -> str:
+    return urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+
+def _params(clause: object) -> dict:
+    return clause.compile(dialect=postgresql.dialect()).params  # type: ignore
+
+
+@pytest.mark.parametrize(
+    "sort_by, value",
+    [
+        (None, None),
+        ("price", 19.99),
+        ("title", "Lamp"),
+        ("created_at", datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc)),
+    ],
+)
+def test_cursor_round_trips(sort_by, value):
+    product = Product(id="product-1")
+    if sort_by:
+        setattr(product, sort_by, value)
+
+    for descending in (False, True):
+        cursor = product.cursor(sort_by, descending)
+        params = _params(
+            Product._keyset_condition(cursor, sort_by, descending)
+        )
+        assert "product-1" in params.values()
+        if value is not None:
+            assert value in params.values()
+
+
+def test_enum_cursor_round_trips():
+    order = Order(id="order-1", status=OrderStatus.shipped)
+
+    cursor = order.cursor("status")
+    params = _params(Order._keyset_condition(cursor, "status", False))
+
+    assert OrderStatus.shipped in params.values()
+
+
+def test_null_sort_value_round_trips():
+    product = Product(id="product-1", category=None)
+
+    cursor = product.cursor("category", descending=True)
+
+    assert Product._keyset_condition(cursor, "category", True) is not None
+
+
+@pytest.mark.parametrize(
+    "value",
+    [Decimal("12.50"), uuid4()],
+)
+def test_decimal_and_uuid_values_round_trip(value):
+    typed = column("key", Numeric() if isinstance(value, Decimal) else Uuid())
+
+    encoded = json.loads(json.dumps(_encode_value(value)))
+
+    assert _decode_value(typed, encoded) == value
+
+
+@pytest.mark.parametrize(
+    "cursor, sort_by",
+    [
+        ("not base64!", None),
+        (urlsafe_b64encode(b"not json").decode(), None),
+        (_cursor({"sort_by": None}), None),
+        (_cursor([None, False, None]), None),
+        (_cursor([None, False, None, 42]), None),
+        (_cursor(["status", False, "returned", "order-1"]), "status"),
+        (_cursor(["status", False, ["shipped"], "order-1"]), "status"),
+        (_cursor(["created_at", False, 1700000000, "order-1"]), "created_at"),
+        (_cursor(["created_at", False, "yesterday", "order-1"]), "created_at"),
+        (_cursor(["total", False, "cheap", "order-1"]), "total"),
+    ],
+)
+def test_malformed_cursor_is_rejected(cursor, sort_by):
+    with pytest.raises(ValueError, match="Invalid pagination cursor"):
+        Order._keyset_condition(cursor, sort_by, False)
+
+
+def test_cursor_for_another_sort_order_is_rejected():
+    cursor = Order(id="order-1", total=10.0).cursor("total")
+
+    with pytest.raises(ValueError, match="does not match"):
+        Order._keyset_condition(cursor, "total", True)
@@ -0,0 +1,47 @@
+import pytest
+from fastapi.testclient import TestClient
+
+from app import app
+from app.core.middleware import get_read_user
+from app.models.user import User, UserRole
+
+
+@pytest.fixture
+def client(redis):
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def _sign_in_as(role: UserRole) -> None:
+    app.dependency_overrides[get_read_user] = lambda: User(
+        id="user-1", role=role
+    )
+
+
+def test_health_check_does_not_expose_internals(client):
+    response = client.get("/")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "healthy"
+    assert "database_pool" not in response.json()
+
+
+def test_metrics_require_authentication(client):
+    assert client.get("/metrics").status_code in (401, 403)
+
+
+def test_metrics_are_refused_to_customers(client):
+    _sign_in_as(UserRole.customer)
+
+    assert client.get("/metrics").status_code == 403
+
+
+def test_metrics_are_served_to_admins(client):
+    _sign_in_as(UserRole.admin)
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert {"database_pool", "rate_limit", "permission_cache"} <= set(
+        response.json()
+    )
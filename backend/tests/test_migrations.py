@@ -0,0 +1,15 @@
+from pathlib import Path
+
+from alembic.config import Config
+from alembic.script import ScriptDirectory
+
+ROOT = Path(__file__).parent.parent
+
+
+def test_migrations_form_a_single_chain():
+    config = Config(ROOT / "alembic.ini")
+    config.set_main_option("script_location", str(ROOT / "alembic"))
+    scripts = ScriptDirectory.from_config(config)
+
+    assert len(scripts.get_bases()) == 1
+    assert len(scripts.get_heads()) == 1
@@ -0,0 +1,111 @@
+from typing import Optional
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import app
+from app.core.config import settings
+from app.core.security import otp
+from app.models.user import User
+
+
+async def test_correct_code_is_accepted_once(redis):
+    code = await otp.issue("ada@example.com")
+
+    assert await otp.verify("ada@example.com", code)
+    assert not await otp.verify("ada@example.com", code)
+
+
+async def test_code_matches_the_normalized_email(redis):
+    code = await otp.issue("Ada@Example.com")
+
+    assert await otp.verify(" ada@example.com ", code)
+
+
+async def test_code_expires(redis):
+    await otp.issue("ada@example.com")
+
+    (key,) = await redis.keys(otp.OTP_PREFIX + "*")
+    assert 0 < await redis.ttl(key) <= settings.OTP_EXPIRE_MINUTES * 60
+
+
+async def test_new_code_replaces_the_pending_one(redis):
+    first = await otp.issue("ada@example.com")
+    second = await otp.issue("ada@example.com")
+
+    if first != second:
+        assert not await otp.verify("ada@example.com", first)
+    assert await otp.verify("ada@example.com", second)
+
+
+async def test_last_allowed_attempt_can_still_succeed(redis):
+    code = await otp.issue("ada@example.com")
+    wrong = "000000" if code != "000000" else "111111"
+
+    for _ in range(settings.OTP_MAX_ATTEMPTS - 1):
+        assert not await otp.verify("ada@example.com", wrong)
+
+    assert await otp.verify("ada@example.com", code)
+
+
+async def test_code_is_discarded_after_max_attempts(redis):
+    code = await otp.issue("ada@example.com")
+    wrong = "000000" if code != "000000" else "111111"
+
+    for _ in range(settings.OTP_MAX_ATTEMPTS):
+        assert not await otp.verify("ada@example.com", wrong)
+
+    assert not await otp.verify("ada@example.com", code)
+    assert not await redis.keys(otp.OTP_PREFIX + "*")
+
+
+async def test_requests_are_throttled_per_email(redis):
+    for _ in range(settings.OTP_REQUESTS_PER_EMAIL):
+        assert await otp.throttle("ada@example.com", None) is None
+
+    retry_after = await otp.throttle("ada@example.com", None)
+
+    assert 0 < retry_after <= settings.OTP_REQUEST_WINDOW_SECONDS
+    assert await otp.throttle("grace@example.com", None) is None
+
+
+async def test_requests_are_throttled_per_ip(redis):
+    for number in range(settings.OTP_REQUESTS_PER_IP):
+        email = f"user{number}@example.com"
+        assert await otp.throttle(email, "203.0.113.5") is None
+
+    assert await otp.throttle("another@example.com", "203.0.113.5")
+    assert await otp.throttle("another@example.com", "203.0.113.6") is None
+
+
+@pytest.mark.parametrize(
+    "peer, expected",
+    [
+        # A trusted proxy forwards the real client
+        ("127.0.0.1", "203.0.113.5"),
+        # Anyone else cannot pick the address they are throttled under
+        ("198.51.100.7", "198.51.100.7"),
+    ],
+)
+def test_request_otp_throttles_the_forwarded_client(
+    redis, monkeypatch, peer, expected
+):
+    throttled: list[Optional[str]] = []
+
+    async def throttle(email: str, ip: Optional[str]) -> None:
+        throttled.append(ip)
+
+    async def no_user(*args: object, **kwargs: object) -> None:
+        return None
+
+    monkeypatch.setattr(otp, "throttle", throttle)
+    monkeypatch.setattr(User, "get", no_user)
+
+    response = TestClient(app, client=(peer, 40000)).post(
+        "/auth/request-otp",
+        json={"email": "ada@example.com"},
+        headers={"X-Forwarded-For": "203.0.113.5"},
+    )
+
+    assert response.status_code == 404
+    assert throttled == [expected]
@@ -0,0 +1,11 @@
+from app.core.security.policy import LocalPolicy
+
+
+def test_shipped_policy_grants_by_role():
+    policy = LocalPolicy.from_file()
+
+    assert policy.is_allowed("admin", "delete", "product")
+    assert policy.is_allowed("customer", "create", "order")
+    assert not policy.is_allowed("customer", "delete", "product")
+    assert not policy.is_allowed("unknown", "read", "product")
+    assert not policy.is_allowed(None, "read", "product")
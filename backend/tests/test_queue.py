@@ -0,0 +1,27 @@
+from fakeredis import FakeRedis
+from rq import Queue, SimpleWorker
+from rq.job import Job, JobStatus
+
+from app.core.redis import AsyncQueue, redis_client
+
+
+def add(a: int, b: int = 0) -> int:
+    return a + b
+
+
+async def test_async_queue_jobs_run_on_a_stock_rq_worker(redis, redis_server):
+    queue = AsyncQueue("test", connection=redis_client)
+    job = await queue.enqueue(add, 2, b=3)
+
+    connection = FakeRedis(server=redis_server)
+    rq_queue = Queue("test", connection=connection)
+    assert rq_queue.job_ids == [job.id]
+    assert rq_queue in Queue.all(connection=connection)
+
+    worker = SimpleWorker([rq_queue], connection=connection)
+    assert worker.work(burst=True)
+
+    finished = Job.fetch(job.id, connection=connection)
+    assert finished.get_status() == JobStatus.FINISHED
+    assert finished.return_value() == 5
+    assert finished.timeout == Queue.DEFAULT_TIMEOUT
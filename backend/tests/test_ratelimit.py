@@ -0,0 +1,173 @@
+import jwt
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from redis.exceptions import ConnectionError
+from starlette.routing import Route
+
+from app import app
+from app.core.config import settings
+from app.core.ratelimit import RateLimit, RateLimiter, client_key
+
+
+def scope(method: str, path: str, **extra: object) -> dict:
+    return {
+        "type": "http",
+        "app": app,
+        "method": method,
+        "path": path,
+        "root_path": "",
+        "headers": [],
+        **extra,
+    }
+
+
+async def test_bucket_allows_capacity_then_limits(redis):
+    limiter = RateLimiter("300/minute", {})
+    limit = RateLimit.parse("3/minute")
+
+    for _ in range(3):
+        assert await limiter.take("ip:203.0.113.5", limit) == (True, 0)
+
+    allowed, retry_after = await limiter.take("ip:203.0.113.5", limit)
+
+    assert not allowed
+    assert retry_after == 20
+    assert await limiter.take("ip:203.0.113.6", limit) == (True, 0)
+    assert limiter.fallbacks == 0
+
+
+async def test_bucket_expires_once_it_would_be_full(redis):
+    limiter = RateLimiter("300/minute", {})
+    limit = RateLimit.parse("1/minute")
+    await limiter.take("ip:203.0.113.5", limit)
+
+    tokens = await redis.hget("ratelimit:ip:203.0.113.5", "tokens")
+
+    assert float(tokens) == 0
+    assert 0 < await redis.ttl("ratelimit:ip:203.0.113.5") <= 60
+
+
+async def test_falls_back_to_local_buckets_without_redis(redis, monkeypatch):
+    async def unavailable(*args: object, **kwargs: object) -> None:
+        raise ConnectionError("down")
+
+    monkeypatch.setattr("app.core.ratelimit._take_token_script", unavailable)
+    limiter = RateLimiter("300/minute", {})
+    limit = RateLimit.parse("2/minute")
+
+    assert await limiter.take("ip:203.0.113.5", limit) == (True, 0)
+    assert await limiter.take("ip:203.0.113.5", limit) == (True, 0)
+    allowed, retry_after = await limiter.take("ip:203.0.113.5", limit)
+
+    assert not allowed
+    assert retry_after == 30
+    assert limiter.fallbacks == 3
+    assert not limiter.stats()["redis_available"]
+
+
+async def test_local_buckets_expire_only_once_idle(redis, monkeypatch):
+    clock = [1000.0]
+    for module in ("app.core.cache", "app.core.ratelimit"):
+        monkeypatch.setattr(f"{module}.monotonic", lambda: clock[0])
+
+    async def unavailable(*args: object, **kwargs: object) -> None:
+        raise ConnectionError("down")
+
+    monkeypatch.setattr("app.core.ratelimit._take_token_script", unavailable)
+    limiter = RateLimiter("2/minute", {})
+    limit = limiter.default
+
+    assert (await limiter.take("ip:203.0.113.5", limit))[0]
+    assert (await limiter.take("ip:203.0.113.5", limit))[0]
+    clock[0] += 45
+    # Refilled to 1.5 tokens; one is taken
+    assert (await limiter.take("ip:203.0.113.5", limit))[0]
+    clock[0] += 20
+
+    # Past the period since creation the bucket is kept, not reset to full
+    assert (await limiter.take("ip:203.0.113.5", limit))[0]
+    assert not (await limiter.take("ip:203.0.113.5", limit))[0]
+
+
+def test_configured_limits_match_the_app_routes():
+    limiter = RateLimiter(settings.RATE_LIMIT_DEFAULT, settings.RATE_LIMITS)
+    limiter.bind(app.router.routes)
+
+    name, limit = limiter.resolve(scope("GET", "/products/"))
+
+    assert name == "GET /products/"
+    assert limit.capacity == 120
+    assert limiter.resolve(scope("GET", "/products/abc"))[0] == "*"
+    assert limiter.resolve(scope("POST", "/products/"))[0] == "*"
+
+
+def test_limits_for_unknown_routes_are_rejected():
+    limiter = RateLimiter("300/minute", {"GET /products": "120/minute"})
+
+    with pytest.raises(ValueError, match="GET /products"):
+        limiter.bind(app.router.routes)
+
+
+def test_routes_resolve_by_path_parameters():
+    async def endpoint() -> None:
+        pass
+
+    other = FastAPI()
+    other.router.routes.append(Route("/items/{id}", endpoint))
+    limiter = RateLimiter("300/minute", {"GET /items/{id}": "5/second"})
+    limiter.bind(other.router.routes)
+
+    name, limit = limiter.resolve(scope("GET", "/items/42", app=other))
+
+    assert name == "GET /items/{id}"
+    assert limit.capacity == 5
+
+
+def test_client_key_uses_the_resolved_client_address():
+    assert client_key(scope("GET", "/", client=("203.0.113.5", 1))) == (
+        "ip:203.0.113.5"
+    )
+    assert client_key(scope("GET", "/")) == "ip:unknown"
+
+
+def test_client_key_prefers_a_valid_bearer_token():
+    token = jwt.encode({"user_id": "u1"}, settings.SECRET_KEY, "HS256")
+    forged = jwt.encode({"user_id": "u2"}, "not-the-secret", "HS256")
+    client = ("203.0.113.5", 1)
+
+    def key(token: str) -> str:
+        headers = [(b"authorization", f"Bearer {token}".encode())]
+        return client_key(scope("GET", "/", client=client, headers=headers))
+
+    assert key(token) == "user:u1"
+    assert key(forged) == "ip:203.0.113.5"
+
+
+@pytest.mark.parametrize(
+    "peer, expected",
+    [
+        # A trusted proxy forwards the real client
+        ("127.0.0.1", "ip:203.0.113.5"),
+        # Anyone else is limited by their own address
+        ("198.51.100.7", "ip:198.51.100.7"),
+    ],
+)
+def test_requests_are_limited_by_the_forwarded_client(
+    redis, monkeypatch, peer, expected
+):
+    taken: list[str] = []
+
+    async def take(key: str, limit: RateLimit) -> tuple[bool, int]:
+        taken.append(key)
+        return False, 7
+
+    monkeypatch.setattr("app.core.ratelimit.rate_limiter.take", take)
+
+    response = TestClient(app, client=(peer, 40000)).get(
+        "/products/", headers={"X-Forwarded-For": "203.0.113.5"}
+    )
+
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "7"
+    assert taken == [f"GET /products/:{expected}"]
@@ -0,0 +1,83 @@
+from app.core.cache import (
+    TAG_PREFIX,
+    TAG_WRITTEN_PREFIX,
+    get_cached_response,
+    invalidate_tags,
+    set_cached_response,
+)
+
+
+async def test_cached_response_is_served_with_its_etag(redis):
+    cached, versions = await get_cached_response("response:a", ["products"])
+    assert cached is None
+    assert versions == [0]
+
+    etag = await set_cached_response(
+        "response:a", b"[1]", ["products"], versions
+    )
+
+    cached, _ = await get_cached_response("response:a", ["products"])
+    assert cached == (b"[1]", etag)
+
+
+async def test_invalidation_drops_only_tagged_responses(redis):
+    for key, tag in [("response:a", "products"), ("response:b", "product:1")]:
+        _, versions = await get_cached_response(key, [tag])
+        await set_cached_response(key, b"{}", [tag], versions)
+
+    await invalidate_tags("products")
+
+    assert (await get_cached_response("response:a", ["products"]))[0] is None
+    assert (await get_cached_response("response:b", ["product:1"]))[0]
+    assert not await redis.exists(TAG_PREFIX + "products")
+
+
+async def test_reader_that_started_before_invalidation_does_not_cache(redis):
+    # The reader misses and queries the database before a write commits
+    _, versions = await get_cached_response("response:a", ["products"])
+    await invalidate_tags("products")
+
+    await set_cached_response("response:a", b"stale", ["products"], versions)
+
+    cached, versions = await get_cached_response("response:a", ["products"])
+    assert cached is None
+    assert versions == [1]
+
+
+async def test_any_invalidated_tag_blocks_the_write(redis):
+    tags = ["products", "product:1"]
+    _, versions = await get_cached_response("response:a", tags)
+    await invalidate_tags("product:1")
+
+    await set_cached_response("response:a", b"stale", tags, versions)
+
+    assert (await get_cached_response("response:a", tags))[0] is None
+
+
+async def test_replica_reads_are_not_cached_right_after_invalidation(redis):
+    await invalidate_tags("products")
+    _, versions = await get_cached_response("response:a", ["products"])
+
+    # A lagging replica may still serve the rows from before the write
+    await set_cached_response(
+        "response:a", b"stale", ["products"], versions, replica=True
+    )
+    assert (await get_cached_response("response:a", ["products"]))[0] is None
+
+    await set_cached_response(
+        "response:a", b"fresh", ["products"], versions, replica=False
+    )
+    cached, _ = await get_cached_response("response:a", ["products"])
+    assert cached is not None and cached[0] == b"fresh"
+
+
+async def test_replica_reads_are_cached_once_replicas_caught_up(redis):
+    await invalidate_tags("products")
+    await redis.delete(TAG_WRITTEN_PREFIX + "products")
+    _, versions = await get_cached_response("response:a", ["products"])
+
+    await set_cached_response(
+        "response:a", b"[1]", ["products"], versions, replica=True
+    )
+
+    assert (await get_cached_response("response:a", ["products"]))[0]
@@ -0,0 +1,157 @@
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+from redis.exceptions import ConnectionError
+
+from app.core import middleware
+from app.core.config import settings
+from app.core.security import jwt, revocation
+from app.core.security.jwt import create_token
+from app.models.auth import Auth
+from app.models.user import User, UserRole
+
+
+def session_tokens() -> tuple[str, datetime]:
+    token = create_token("user-1")
+    return revocation.token_digest(token), revocation.token_expiry(token)
+
+
+def make_user(**overrides: object) -> User:
+    now = datetime.now(timezone.utc)
+    fields: dict[str, object] = {
+        "id": "user-1",
+        "email": "ada@example.com",
+        "first_name": "Ada",
+        "last_name": "Lovelace",
+        "role": UserRole.customer,
+        "is_suspended": False,
+        "created_at": now,
+        "updated_at": now,
+    }
+    return User(**{**fields, **overrides})
+
+
+async def test_revoked_token_is_reported_by_lookup(redis):
+    token = create_token("user-1")
+
+    await revocation.revoke(
+        (revocation.token_digest(token), revocation.token_expiry(token))
+    )
+    revoked, suspended, user = await revocation.lookup(token, "user-1")
+
+    assert revoked
+    assert not suspended
+    assert user is None
+    assert 0 < await redis.ttl(
+        revocation.REVOKED_PREFIX + revocation.token_digest(token)
+    ) <= settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+
+
+async def test_revocation_failure_keeps_the_session(monkeypatch):
+    async def unavailable(*tokens: str) -> None:
+        raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(settings, "STATELESS_TOKEN_VERIFICATION", True)
+    monkeypatch.setattr(revocation, "revoke", unavailable)
+
+    with pytest.raises(HTTPException) as e:
+        await jwt._revoke(session_tokens())
+    assert e.value.status_code == 503
+
+
+async def test_revocations_are_skipped_without_stateless_verification(
+    redis, monkeypatch
+):
+    monkeypatch.setattr(settings, "STATELESS_TOKEN_VERIFICATION", False)
+
+    await jwt._revoke(session_tokens())
+
+    assert await redis.dbsize() == 0
+
+
+async def test_suspension_rejects_a_cached_user(redis, monkeypatch):
+    async def save(self: User, db: object) -> User:
+        return self
+
+    monkeypatch.setattr(settings, "STATELESS_TOKEN_VERIFICATION", True)
+    monkeypatch.setattr(User, "save", save)
+    user = make_user()
+    token = create_token(user.id)
+    await revocation.cache_user(user)
+
+    await jwt.suspend_user(None, user)  # type: ignore[arg-type]
+
+    assert user.is_suspended
+    revoked, suspended, cached = await revocation.lookup(token, user.id)
+    assert (revoked, suspended, cached) == (False, True, None)
+
+    # A request that loaded the user before the suspension re-caches it
+    await revocation.cache_user(make_user())
+    with pytest.raises(HTTPException) as e:
+        await jwt._verify_stateless(token, user.id)
+    assert e.value.status_code == 401
+
+    await jwt.suspend_user(None, user, suspended=False)  # type: ignore[arg-type]
+
+    assert not await redis.exists(revocation.SUSPENDED_PREFIX + user.id)
+
+
+async def test_suspension_is_not_saved_without_redis(monkeypatch):
+    async def unavailable(*args: object) -> None:
+        raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(settings, "STATELESS_TOKEN_VERIFICATION", True)
+    monkeypatch.setattr(revocation, "set_suspended", unavailable)
+    user = make_user()
+
+    with pytest.raises(HTTPException) as e:
+        await jwt.suspend_user(None, user)  # type: ignore[arg-type]
+    assert e.value.status_code == 503
+    assert not user.is_suspended
+
+
+async def test_role_assignment_drops_the_user_snapshot(redis, monkeypatch):
+    async def assigned() -> None:
+        return None
+
+    monkeypatch.setattr(settings, "STATELESS_TOKEN_VERIFICATION", True)
+    monkeypatch.setattr(
+        middleware.permit.api.users,
+        "assign_role",
+        lambda assignment: assigned(),
+    )
+    monkeypatch.setattr(middleware, "local_policy", None)
+    await revocation.cache_user(make_user())
+
+    await middleware.assign_role("user-1", UserRole.admin.value)
+
+    assert not await redis.exists(revocation.USER_PREFIX + "user-1")
+
+
+async def test_invalid_snapshot_falls_back_to_the_database(redis):
+    token = create_token("user-1")
+    await redis.set(revocation.USER_PREFIX + "user-1", '{"id": "user-1"}')
+
+    revoked, suspended, user = await revocation.lookup(token, "user-1")
+
+    assert (revoked, suspended, user) == (False, False, None)
+    assert not await redis.exists(revocation.USER_PREFIX + "user-1")
+    assert await jwt._verify_stateless(token, "user-1") is None
+
+
+async def test_sessions_revoke_their_tokens_from_stored_digests(redis):
+    access_token = create_token("user-1")
+    refresh_token = create_token("user-1", "refresh")
+    auth = Auth(user_id="user-1")
+    auth.set_tokens(access_token, refresh_token)
+
+    await revocation.revoke(*auth.tokens())
+
+    assert (await revocation.lookup(access_token, "user-1"))[0]
+    assert 0 < await redis.ttl(
+        revocation.REVOKED_PREFIX + auth.refresh_token_hash
+    ) <= settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60
+    assert await redis.ttl(
+        revocation.REVOKED_PREFIX + auth.access_token_hash
+    ) <= settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
@@ -0,0 +1,158 @@
+import socket
+from email.message import EmailMessage
+from email.parser import BytesParser
+from email.utils import formataddr
+from typing import Any, Iterator
+
+import aiosmtplib
+import pytest
+from aiosmtpd.controller import Controller
+from fastapi_mail import ConnectionConfig
+from pydantic import SecretStr
+
+from app.core import email
+from app.core.smtp import SMTPPool
+
+
+class Inbox:
+    """aiosmtpd handler keeping every accepted message and its client"""
+
+    def __init__(self) -> None:
+        self.messages: list[bytes] = []
+        self.peers: list[Any] = []
+        self.reject = False
+        self.port = 0
+
+    async def handle_DATA(self, server: Any, session: Any, envelope: Any) -> str:
+        if self.reject:
+            return "554 Transaction failed"
+        self.messages.append(envelope.content)
+        self.peers.append(session.peer)
+        return "250 OK"
+
+    @property
+    def connections(self) -> int:
+        return len(set(self.peers))
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.fixture
+def inbox() -> Iterator[Inbox]:
+    handler = Inbox()
+    controller = Controller(handler, hostname="127.0.0.1", port=_free_port())
+    controller.start()
+    handler.port = controller.port
+    yield handler
+    controller.stop()
+
+
+@pytest.fixture
+def config(inbox: Inbox) -> ConnectionConfig:
+    return ConnectionConfig(
+        MAIL_USERNAME="shop",
+        MAIL_PASSWORD=SecretStr("secret"),
+        MAIL_FROM="shop@example.com",
+        MAIL_FROM_NAME="Shop",
+        MAIL_PORT=inbox.port,
+        MAIL_SERVER="127.0.0.1",
+        MAIL_STARTTLS=False,
+        MAIL_SSL_TLS=False,
+        USE_CREDENTIALS=False,
+        VALIDATE_CERTS=False,
+        TIMEOUT=5,
+    )
+
+
+def _message(number: int = 1) -> EmailMessage:
+    message = EmailMessage()
+    message["Subject"] = f"Message {number}"
+    message["From"] = "shop@example.com"
+    message["To"] = "customer@example.com"
+    message.set_content("Hello")
+    return message
+
+
+async def test_sends_reuse_one_connection(config, inbox):
+    pool = SMTPPool(config, size=2, max_messages=100)
+
+    for number in range(3):
+        await pool.send(_message(number))
+    await pool.close()
+
+    assert len(inbox.messages) == 3
+    assert inbox.connections == 1
+
+
+async def test_connection_is_retired_after_max_messages(config, inbox):
+    pool = SMTPPool(config, size=1, max_messages=2)
+
+    for number in range(3):
+        await pool.send(_message(number))
+    await pool.close()
+
+    assert inbox.connections == 2
+
+
+async def test_connection_is_discarded_after_a_failed_send(config, inbox):
+    pool = SMTPPool(config, size=1, max_messages=100)
+    await pool.send(_message())
+
+    inbox.reject = True
+    with pytest.raises(aiosmtplib.SMTPDataError):
+        await pool.send(_message())
+    assert pool._idle == []
+
+    inbox.reject = False
+    await pool.send(_message())
+    await pool.close()
+
+    assert len(inbox.messages) == 2
+    assert inbox.connections == 2
+
+
+async def test_dropped_connection_is_replaced_and_the_send_retried(
+    config, inbox
+):
+    pool = SMTPPool(config, size=1, max_messages=100)
+    await pool.send(_message())
+
+    pooled = pool._idle[0].smtp
+
+    async def disconnected(*args: Any, **kwargs: Any) -> None:
+        pooled.close()
+        raise aiosmtplib.SMTPServerDisconnected("gone")
+
+    pooled.send_message = disconnected  # type: ignore
+    await pool.send(_message(2))
+    await pool.close()
+
+    assert len(inbox.messages) == 2
+    assert inbox.connections == 2
+
+
+async def test_delivered_email_comes_from_the_configured_sender(
+    config, inbox, monkeypatch
+):
+    monkeypatch.setattr(email, "email_config", config)
+    monkeypatch.setattr(
+        email, "smtp_pool", SMTPPool(config, size=1, max_messages=100)
+    )
+
+    await email.deliver_email(
+        "Your OTP Code for Authentication",
+        "customer@example.com",
+        "sign-in.mjml",
+        {"first_name": "Ada", "otp": "123456"},
+    )
+    await email.smtp_pool.close()  # type: ignore
+
+    message = BytesParser().parsebytes(inbox.messages[0])
+    assert message["From"] == formataddr(("Shop", "shop@example.com"))
+    assert message["To"] == "customer@example.com"
+    assert message.get_content_type() == "text/html"
+    assert "123456" in message.get_payload(decode=True).decode()
@@ -0,0 +1,163 @@
+import itertools
+from typing import Any
+
+import pytest
+
+import worker
+from worker import WorkerSupervisor, parse_weighted_queues
+
+pids = itertools.count(1000)
+
+
+class FakeProcess:
+    def __init__(self, target: Any = None, args: Any = ()) -> None:
+        self.pid = next(pids)
+        self.alive = True
+        self.exitcode: int | None = None
+
+    def start(self) -> None:
+        pass
+
+    def is_alive(self) -> bool:
+        return self.alive
+
+    def join(self) -> None:
+        pass
+
+
+class FakeContext:
+    Process = FakeProcess
+
+
+@pytest.fixture
+def killed(monkeypatch) -> list[int]:
+    signalled: list[int] = []
+    monkeypatch.setattr(
+        worker.os, "kill", lambda pid, sig: signalled.append(pid)
+    )
+    return signalled
+
+
+def supervisor(**weights: int) -> WorkerSupervisor:
+    pool = WorkerSupervisor(
+        weights, min_workers=1, max_workers=8, jobs_per_worker=10
+    )
+    pool.context = FakeContext()  # type: ignore[assignment]
+    return pool
+
+
+def primaries(pool: WorkerSupervisor) -> list[str]:
+    return sorted(
+        primary
+        for pid, (_, primary) in pool.children.items()
+        if pid not in pool.retiring
+    )
+
+
+def test_workers_are_split_by_queue_weight():
+    pool = supervisor(email=3, maintenance=1)
+
+    for _ in range(4):
+        pool.spawn()
+
+    assert primaries(pool) == ["email"] * 3 + ["maintenance"]
+
+
+def test_retiring_workers_do_not_count_towards_shares():
+    pool = supervisor(email=3, maintenance=1)
+    for primary in ["email", "email", "maintenance", "maintenance"]:
+        process = FakeProcess()
+        pool.children[process.pid] = (process, primary)  # type: ignore
+    pool.retiring = {
+        pid
+        for pid, (_, primary) in pool.children.items()
+        if primary == "maintenance"
+    }
+
+    pool.spawn()
+
+    # Of three active workers a quarter of the weight is one worker
+    assert primaries(pool) == ["email", "email", "maintenance"]
+
+
+def test_scale_down_keeps_the_only_worker_of_a_queue(killed):
+    pool = supervisor(email=1, maintenance=1)
+    pool.spawn()
+    pool.spawn()
+    pool.spawn()
+    # The maintenance worker crashes and its replacement is the newest
+    crashed = next(
+        pid
+        for pid, (_, primary) in pool.children.items()
+        if primary == "maintenance"
+    )
+    pool.children[crashed][0].alive = False  # type: ignore[attr-defined]
+    pool.reap()
+    assert primaries(pool) == ["email", "email", "maintenance"]
+
+    pool.retire()
+
+    assert primaries(pool) == ["email", "maintenance"]
+    assert pool.children[killed[0]][1] == "email"
+
+
+def test_crashed_workers_are_restarted_for_their_queue():
+    pool = supervisor(email=1, maintenance=1)
+    pool.spawn()
+    pool.spawn()
+    pid, (process, primary) = next(iter(pool.children.items()))
+    process.alive = False  # type: ignore[attr-defined]
+
+    pool.reap()
+
+    assert pid not in pool.children
+    assert primaries(pool) == ["email", "maintenance"]
+
+
+def test_retired_workers_are_not_restarted(killed):
+    pool = supervisor(email=1, maintenance=1)
+    pool.spawn()
+    pool.spawn()
+    pool.retire()
+    process, _ = pool.children[killed[0]]
+    process.alive = False  # type: ignore[attr-defined]
+
+    pool.reap()
+
+    assert len(pool.children) == 1
+    assert not pool.retiring
+
+
+@pytest.mark.parametrize(
+    "backlog, oldest, active, expected",
+    [
+        (0, 0.0, 0, 1),  # never below min_workers
+        (35, 0.0, 1, 4),  # one worker per jobs_per_worker jobs
+        (5, 30.0, 2, 3),  # old jobs add a worker
+        (500, 0.0, 2, 8),  # never above max_workers
+    ],
+)
+def test_desired_workers(backlog, oldest, active, expected):
+    pool = supervisor(email=1)
+    for _ in range(active):
+        pool.spawn()
+
+    assert pool.desired_workers(backlog, oldest) == expected
+
+
+def test_desired_workers_ignores_retiring_workers(killed):
+    pool = supervisor(email=1)
+    pool.spawn()
+    pool.spawn()
+    pool.retire()
+
+    assert pool.desired_workers(0, 30.0) == 2
+
+
+def test_queue_weights_are_parsed():
+    assert parse_weighted_queues(["email:3", "maintenance"]) == {
+        "email": 3,
+        "maintenance": 1,
+    }
+    with pytest.raises(SystemExit):
+        parse_weighted_queues(["reports"])
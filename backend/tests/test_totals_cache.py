@@ -0,0 +1,75 @@
+from typing import Any
+
+from app.core.cache import (
+    get_cached_total,
+    invalidate_totals,
+    set_cached_total,
+)
+from app.core.config import settings
+from app.core.database import WRITTEN_TABLES, commit
+
+
+class RecordingSession:
+    """Stands in for AsyncSession; notes the cached total at commit time"""
+
+    def __init__(self) -> None:
+        self.info: dict[str, Any] = {}
+        self.total_at_commit: int | None = None
+
+    async def commit(self) -> None:
+        self.total_at_commit, _ = await get_cached_total("products", "all")
+
+
+async def test_commit_drops_totals_of_written_tables_before_returning(redis):
+    await set_cached_total("products", "all", 10, 0)
+    await set_cached_total("orders", "all", 3, 0)
+    session = RecordingSession()
+    session.info[WRITTEN_TABLES] = {"products"}
+
+    await commit(session)  # type: ignore
+
+    assert session.total_at_commit == 10
+    assert await get_cached_total("products", "all") == (None, 1)
+    assert await get_cached_total("orders", "all") == (3, None)
+    assert WRITTEN_TABLES not in session.info
+
+
+async def test_commit_without_writes_keeps_totals(redis):
+    await set_cached_total("products", "all", 10, 0)
+
+    await commit(RecordingSession())  # type: ignore
+
+    assert await get_cached_total("products", "all") == (10, None)
+
+
+async def test_total_counted_before_a_write_is_not_stored_after_it(redis):
+    _, version = await get_cached_total("products", "all")
+    # The write commits and invalidates while the count is running
+    session = RecordingSession()
+    session.info[WRITTEN_TABLES] = {"products"}
+    await commit(session)  # type: ignore
+
+    await set_cached_total("products", "all", 10, version)
+
+    assert await get_cached_total("products", "all") == (None, 1)
+
+
+async def test_totals_of_a_table_share_one_expiry(redis, monkeypatch):
+    monkeypatch.setattr(settings, "COUNT_CACHE_TTL", 30)
+    await set_cached_total("products", "all", 10, 0)
+    await redis.expire("totals:products", 5)
+
+    await set_cached_total("products", "featured", 4, 0)
+
+    assert await redis.ttl("totals:products") <= 5
+
+
+async def test_replica_counts_are_not_cached_right_after_a_write(redis):
+    await invalidate_totals(["products"])
+    _, version = await get_cached_total("products", "all")
+
+    await set_cached_total("products", "all", 10, version, replica=True)
+    assert await get_cached_total("products", "all") == (None, 1)
+
+    await set_cached_total("products", "all", 11, version, replica=False)
+    assert await get_cached_total("products", "all") == (11, None)
@@ -0,0 +1,118 @@
+from typing import Any
+from uuid import uuid4
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import app
+from app.api import auth
+from app.core.database import get_db, unit_of_work
+from app.models.product import Product
+from app.models.user import User
+
+
+class RecordingSession:
+    """Stands in for AsyncSession and records what reaches the database"""
+
+    def __init__(self) -> None:
+        self.info: dict[str, Any] = {}
+        self.pending: list[Any] = []
+        self.calls: list[str] = []
+
+    def add(self, instance: Any) -> None:
+        self.pending.append(instance)
+
+    def add_all(self, instances: Any) -> None:
+        self.pending.extend(instances)
+
+    async def flush(self) -> None:
+        for instance in self.pending:
+            instance.id = instance.id or str(uuid4())
+        self.calls.append("flush")
+
+    async def commit(self) -> None:
+        await self.flush()
+        self.calls.append("commit")
+
+    async def rollback(self) -> None:
+        self.pending.clear()
+        self.calls.append("rollback")
+
+    async def refresh(self, instance: Any) -> None:
+        self.calls.append("refresh")
+
+
+def product(title: str) -> Product:
+    return Product(title=title, price=10)
+
+
+async def test_save_commits_and_refreshes_outside_a_unit_of_work():
+    db = RecordingSession()
+
+    await product("Lamp").save(db)  # type: ignore[arg-type]
+
+    assert db.calls == ["flush", "commit", "refresh"]
+
+
+async def test_unit_of_work_flushes_each_save_and_commits_once():
+    db = RecordingSession()
+
+    async with unit_of_work(db):  # type: ignore[arg-type]
+        lamp = await product("Lamp").save(db)  # type: ignore[arg-type]
+        assert lamp.id
+        await product("Desk").save(db)  # type: ignore[arg-type]
+        await Product.bulk_save(db, [product("Chair")])  # type: ignore
+        assert "commit" not in db.calls
+
+    assert db.calls == ["flush", "flush", "flush", "flush", "commit"]
+    assert "unit_of_work" not in db.info
+
+
+async def test_unit_of_work_rolls_back_when_the_body_raises():
+    db = RecordingSession()
+
+    with pytest.raises(RuntimeError):
+        async with unit_of_work(db):  # type: ignore[arg-type]
+            await product("Lamp").save(db)  # type: ignore[arg-type]
+            raise RuntimeError("payment failed")
+
+    assert db.calls == ["flush", "rollback"]
+    assert "unit_of_work" not in db.info
+
+
+def test_failed_registration_leaves_no_user_and_sends_no_code(monkeypatch):
+    db = RecordingSession()
+    sent: list[str] = []
+
+    async def no_user(*args: object, **kwargs: object) -> None:
+        return None
+
+    async def synced(user: User) -> None:
+        pass
+
+    async def unavailable(user_id: str, role: str) -> None:
+        raise ConnectionError("permit is down")
+
+    async def send_otp(self: User, is_new: bool = False) -> None:
+        sent.append(self.email)
+
+    monkeypatch.setattr(User, "get", no_user)
+    monkeypatch.setattr(User, "send_otp", send_otp)
+    monkeypatch.setattr(auth, "sync_user", synced)
+    monkeypatch.setattr(auth, "assign_role", unavailable)
+    app.dependency_overrides[get_db] = lambda: db
+    try:
+        response = TestClient(app).post(
+            "/auth/register",
+            json={
+                "email": "ada@example.com",
+                "first_name": "Ada",
+                "last_name": "Lovelace",
+            },
+        )
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 500
+    assert db.calls == ["flush", "rollback"]
+    assert sent == []
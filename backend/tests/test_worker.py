@@ -0,0 +1,62 @@
+import asyncio
+
+from rq.job import Job, JobStatus
+from rq.registry import FailedJobRegistry, StartedJobRegistry
+
+from app.core.redis import AsyncQueue
+from worker import perform_job
+
+release = asyncio.Event()
+
+
+async def wait_for_release() -> str:
+    await release.wait()
+    return "done"
+
+
+async def hang() -> None:
+    await asyncio.sleep(60)
+
+
+async def _enqueue(redis, func, timeout: int = 180) -> str:
+    job = await AsyncQueue("test", redis, default_timeout=timeout).enqueue(
+        func
+    )
+    await redis.lrem(AsyncQueue("test", redis).key, 0, job.id)
+    return job.id
+
+
+async def _status(redis, job_id: str) -> str:
+    return (await redis.hget(Job.key_for(job_id), "status")).decode()
+
+
+async def test_running_job_is_tracked_in_the_started_registry(redis):
+    release.clear()
+    job_id = await _enqueue(redis, wait_for_release)
+    started_key = StartedJobRegistry.key_template.format("test")
+
+    running = asyncio.create_task(perform_job(redis, job_id))
+    while not await redis.zcard(started_key):
+        await asyncio.sleep(0.01)
+
+    (entry,) = await redis.zrange(started_key, 0, -1)
+    assert entry.decode().startswith(f"{job_id}:")
+    assert await _status(redis, job_id) == JobStatus.STARTED.value
+
+    release.set()
+    await running
+
+    assert await redis.zcard(started_key) == 0
+    assert await _status(redis, job_id) == JobStatus.FINISHED.value
+
+
+async def test_job_past_its_timeout_fails(redis):
+    job_id = await _enqueue(redis, hang, timeout=1)
+
+    await asyncio.wait_for(perform_job(redis, job_id), 5)
+
+    assert await _status(redis, job_id) == JobStatus.FAILED.value
+    assert await redis.zscore(
+        FailedJobRegistry.key_template.format("test"), job_id
+    )
+    assert await redis.zcard(StartedJobRegistry.key_template.format("test")) == 0
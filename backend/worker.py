@@ -1,9 +1,41 @@
 import argparse
+import asyncio
+import inspect
+import math
+import multiprocessing
+import os
+import signal
+import time
+import traceback
+import zlib
+from multiprocessing.process import BaseProcess
+from time import monotonic
+from typing import Any
+from uuid import uuid4
 
-from rq import Worker
+from redis import Redis
+from redis.asyncio import Redis as AsyncRedis
+from redis.exceptions import RedisError
+from rq import Queue, Worker
+from rq.defaults import (
+    DEFAULT_FAILURE_TTL,
+    DEFAULT_JOB_MONITORING_INTERVAL,
+    DEFAULT_MAINTENANCE_TASK_INTERVAL,
+    DEFAULT_RESULT_TTL,
+)
+from rq.job import Job, JobStatus
+from rq.registry import FailedJobRegistry, StartedJobRegistry
+from rq.utils import current_timestamp, now, utcformat, utcparse
 
+from app.core import email
+from app.core.config import settings
+from app.core.email import precompile_templates
 from app.core.logging import logger
 from app.core.redis import QUEUE
+from app.core.smtp import SMTPPool
+
+# The worker is synchronous, so it keeps its own blocking Redis client
+redis_client: Redis = Redis.from_url(settings.REDIS_URL)  # type: ignore
 
 
 def start_worker(queue_names: list[str] | None = None) -> None:
@@ -11,8 +43,12 @@ def start_worker(queue_names: list[str] | None = None) -> None:
     Start a worker that listens to specified queues
     If no queues specified, listen to all queues
     """
-    queue_list = [QUEUE[queue_name] for queue_name in (queue_names or QUEUE.keys())]
-    worker = Worker(queue_list)
+    queue_list = [
+        Queue(QUEUE[queue_name].name, connection=redis_client)
+        for queue_name in (queue_names or QUEUE.keys())
+    ]
+    worker = Worker(queue_list, connection=redis_client)
+    precompile_templates()
 
     logger.info(
         f"Starting worker listening to queues: {', '.join(queue_names or QUEUE.keys())}"
@@ -20,14 +56,422 @@ def start_worker(queue_names: list[str] | None = None) -> None:
     worker.work()
 
 
+async def perform_job(connection: AsyncRedis, job_id: str) -> None:
+    """
+    Run one RQ job on the event loop and record its outcome
+    The job sits in its queue's StartedJobRegistry while it runs, so one
+    left behind by a crashed worker is moved to the FailedJobRegistry by
+    registry cleanup, and it is failed once it runs past its timeout
+    """
+    job = Job(job_id, connection=connection)  # type: ignore
+    raw = await connection.hgetall(job.key)
+    if not raw:
+        logger.warning(f"Job {job_id} vanished before it could run")
+        return
+    job.restore(raw)
+
+    timeout = job.timeout or Queue.DEFAULT_TIMEOUT
+    started_key = StartedJobRegistry.key_template.format(job.origin)
+    # Same job_id:execution_id entries as RQ's own workers write
+    execution = f"{job_id}:{uuid4().hex}"
+    async with connection.pipeline(transaction=True) as pipe:
+        pipe.hset(
+            job.key,
+            mapping={
+                "status": JobStatus.STARTED.value,
+                "started_at": utcformat(now()),
+            },
+        )
+        pipe.zadd(
+            started_key,
+            {
+                execution: (
+                    "+inf"
+                    if timeout == -1
+                    else current_timestamp()
+                    + timeout
+                    + DEFAULT_JOB_MONITORING_INTERVAL
+                )
+            },
+        )
+        await pipe.execute()
+
+    try:
+        if inspect.iscoroutinefunction(job.func):
+            call = job.func(*job.args, **job.kwargs)
+        else:
+            call = asyncio.to_thread(job.func, *job.args, **job.kwargs)
+        await asyncio.wait_for(call, None if timeout == -1 else timeout)
+    except Exception:
+        # A job past its timeout fails here with TimeoutError
+        logger.error(f"Job {job_id} failed:\n{traceback.format_exc()}")
+        async with connection.pipeline(transaction=True) as pipe:
+            pipe.hset(
+                job.key,
+                mapping={
+                    "status": JobStatus.FAILED.value,
+                    "ended_at": utcformat(now()),
+                    "exc_info": zlib.compress(
+                        traceback.format_exc().encode()
+                    ),
+                },
+            )
+            pipe.zrem(started_key, execution)
+            pipe.zadd(
+                FailedJobRegistry.key_template.format(job.origin),
+                {job_id: current_timestamp() + DEFAULT_FAILURE_TTL},
+            )
+            await pipe.execute()
+        return
+
+    async with connection.pipeline(transaction=True) as pipe:
+        pipe.hset(
+            job.key,
+            mapping={
+                "status": JobStatus.FINISHED.value,
+                "ended_at": utcformat(now()),
+            },
+        )
+        pipe.zrem(started_key, execution)
+        pipe.expire(job.key, DEFAULT_RESULT_TTL)
+        await pipe.execute()
+
+
+def clean_started_registries(queue_names: list[str]) -> None:
+    """Fail jobs abandoned in the started registries by crashed workers"""
+    for queue_name in queue_names:
+        StartedJobRegistry(
+            QUEUE[queue_name].name, connection=redis_client
+        ).cleanup()
+
+
+async def run_async_worker(queue_names: list[str], concurrency: int) -> None:
+    """
+    Consume RQ queues on one event loop, running up to concurrency jobs at
+    once. Email jobs share a bounded pool of authenticated SMTP connections
+    """
+    connection = AsyncRedis.from_url(settings.REDIS_URL)
+    email.smtp_pool = SMTPPool(
+        email.email_config,
+        size=settings.SMTP_POOL_SIZE,
+        max_messages=settings.SMTP_MAX_MESSAGES_PER_CONNECTION,
+    )
+    precompile_templates()
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stopping.set)
+
+    slots = asyncio.Semaphore(concurrency)
+    running: set[asyncio.Task[None]] = set()
+    keys = [QUEUE[queue_name].key for queue_name in queue_names]
+
+    async def run(job_id: str) -> None:
+        try:
+            await perform_job(connection, job_id)
+        finally:
+            slots.release()
+
+    logger.info(
+        f"Starting async worker ({concurrency} concurrent jobs) listening "
+        f"to queues: {', '.join(queue_names)}"
+    )
+    cleaned_at = 0.0
+    try:
+        while not stopping.is_set():
+            if monotonic() - cleaned_at >= DEFAULT_MAINTENANCE_TASK_INTERVAL:
+                cleaned_at = monotonic()
+                try:
+                    await asyncio.to_thread(
+                        clean_started_registries, queue_names
+                    )
+                except RedisError as e:
+                    logger.warning(f"Could not clean job registries: {e}")
+
+            await slots.acquire()
+            popped = await connection.blpop(keys, timeout=1)
+            if popped is None:
+                slots.release()
+                continue
+
+            task = asyncio.create_task(run(popped[1].decode()))
+            running.add(task)
+            task.add_done_callback(running.discard)
+    finally:
+        logger.info(f"Waiting for {len(running)} running jobs to finish")
+        await asyncio.gather(*running, return_exceptions=True)
+        await email.smtp_pool.close()
+        await connection.aclose()
+
+
+def parse_weighted_queues(specs: list[str]) -> dict[str, int]:
+    """Parse "name" or "name:weight" queue arguments"""
+    weights: dict[str, int] = {}
+    for spec in specs:
+        name, _, weight = spec.partition(":")
+        if name not in QUEUE:
+            raise SystemExit(f"Unknown queue: {name}")
+        weights[name] = int(weight) if weight else 1
+    return weights
+
+
+class WorkerSupervisor:
+    """
+    Forks and monitors a pool of workers, scaling between min_workers and
+    max_workers from queue depth and the age of the oldest waiting job
+    Every worker listens to every queue; each one is assigned a queue to
+    prioritise in proportion to the queue weights so no queue is starved
+    """
+
+    def __init__(
+        self,
+        weights: dict[str, int],
+        min_workers: int,
+        max_workers: int,
+        use_async: bool = False,
+        concurrency: int = 1,
+        jobs_per_worker: int = 20,
+        max_job_age: float = 10.0,
+        interval: float = 2.0,
+        cooldown: float = 30.0,
+    ) -> None:
+        self.weights = weights
+        self.min_workers = min_workers
+        self.max_workers = max(max_workers, min_workers)
+        self.use_async = use_async
+        self.concurrency = concurrency
+        self.jobs_per_worker = jobs_per_worker
+        self.max_job_age = max_job_age
+        self.interval = interval
+        self.cooldown = cooldown
+        self.context = multiprocessing.get_context("fork")
+        self.children: dict[int, tuple[BaseProcess, str]] = {}
+        self.retiring: set[int] = set()
+        self.last_scaled = 0.0
+        self.stopping = False
+
+    def _queue_order(self, primary: str) -> list[str]:
+        others = sorted(
+            (name for name in self.weights if name != primary),
+            key=lambda name: -self.weights[name],
+        )
+        return [primary, *others]
+
+    def _active_counts(self) -> dict[str, int]:
+        """Workers prioritising each queue, not counting retiring ones"""
+        counts = {name: 0 for name in self.weights}
+        for pid, (_, primary) in self.children.items():
+            if pid not in self.retiring:
+                counts[primary] += 1
+        return counts
+
+    def _surplus(self, counts: dict[str, int], size: int) -> dict[str, float]:
+        """How far each queue's worker count is above its weighted share of
+        size workers"""
+        total_weight = sum(self.weights.values())
+        return {
+            name: counts[name] - size * self.weights[name] / total_weight
+            for name in self.weights
+        }
+
+    def _next_primary(self) -> str:
+        """Queue whose share of prioritising workers is furthest below its
+        weight"""
+        counts = self._active_counts()
+        surplus = self._surplus(counts, sum(counts.values()) + 1)
+        return min(self.weights, key=lambda name: surplus[name])
+
+    def spawn(self) -> None:
+        primary = self._next_primary()
+        queues = self._queue_order(primary)
+        if self.use_async:
+            process = self.context.Process(
+                target=lambda: asyncio.run(
+                    run_async_worker(queues, self.concurrency)
+                )
+            )
+        else:
+            process = self.context.Process(target=start_worker, args=(queues,))
+        process.start()
+        self.children[process.pid] = (process, primary)  # type: ignore
+        logger.info(f"Started worker {process.pid} prioritising {primary}")
+
+    def retire(self) -> None:
+        """
+        Warm-shutdown the newest worker of the queue furthest above its
+        weighted share; it finishes its current job
+        """
+        counts = self._active_counts()
+        if not any(counts.values()):
+            return
+        surplus = self._surplus(counts, sum(counts.values()) - 1)
+        primary = max(
+            (name for name in self.weights if counts[name]),
+            key=lambda name: surplus[name],
+        )
+        pid = [
+            pid
+            for pid, (_, queue) in self.children.items()
+            if queue == primary and pid not in self.retiring
+        ][-1]
+        self.retiring.add(pid)
+        os.kill(pid, signal.SIGTERM)
+        logger.info(f"Retiring worker {pid} prioritising {primary}")
+
+    def reap(self) -> None:
+        """Forget exited workers and replace the ones that crashed"""
+        for pid, (process, primary) in list(self.children.items()):
+            if process.is_alive():
+                continue
+            process.join()
+            del self.children[pid]
+            if pid in self.retiring:
+                self.retiring.discard(pid)
+            elif not self.stopping:
+                logger.warning(
+                    f"Worker {pid} ({primary}) exited with code "
+                    f"{process.exitcode}, restarting"
+                )
+                self.spawn()
+
+    def queue_stats(self) -> tuple[int, float]:
+        """Total backlog and age in seconds of the oldest waiting job"""
+        pipe = redis_client.pipeline()
+        for name in self.weights:
+            pipe.llen(QUEUE[name].key)
+            pipe.lindex(QUEUE[name].key, 0)
+        results = pipe.execute()
+
+        backlog = sum(results[0::2])
+        heads = [job_id for job_id in results[1::2] if job_id]
+        oldest = 0.0
+        if heads:
+            pipe = redis_client.pipeline()
+            for job_id in heads:
+                pipe.hget(Job.key_for(job_id.decode()), "enqueued_at")
+            for enqueued_at in pipe.execute():
+                if enqueued_at:
+                    age = now() - utcparse(enqueued_at.decode())
+                    oldest = max(oldest, age.total_seconds())
+        return backlog, oldest
+
+    def desired_workers(self, backlog: int, oldest: float) -> int:
+        active = len(self.children) - len(self.retiring)
+        desired = math.ceil(backlog / self.jobs_per_worker)
+        if oldest > self.max_job_age:
+            desired = max(desired, active + 1)
+        return min(max(desired, self.min_workers), self.max_workers)
+
+    def scale(self) -> None:
+        backlog, oldest = self.queue_stats()
+        active = len(self.children) - len(self.retiring)
+        desired = self.desired_workers(backlog, oldest)
+
+        if desired > active:
+            logger.info(
+                f"Scaling up to {desired} workers (backlog {backlog}, "
+                f"oldest job {oldest:.1f}s)"
+            )
+            for _ in range(desired - active):
+                self.spawn()
+            self.last_scaled = monotonic()
+        elif desired < active:
+            if monotonic() - self.last_scaled < self.cooldown:
+                return
+            # Scale down one worker at a time to avoid thrashing
+            self.retire()
+            self.last_scaled = monotonic()
+
+    def stop(self, *_: Any) -> None:
+        self.stopping = True
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        logger.info(
+            f"Supervising {self.min_workers}-{self.max_workers} workers for "
+            f"queues: {', '.join(f'{n}:{w}' for n, w in self.weights.items())}"
+        )
+
+        for _ in range(self.min_workers):
+            self.spawn()
+
+        while not self.stopping:
+            time.sleep(self.interval)
+            self.reap()
+            if self.stopping:
+                break
+            try:
+                self.scale()
+            except RedisError as e:
+                logger.warning(f"Could not read queue stats: {e}")
+
+        logger.info(f"Stopping {len(self.children)} workers")
+        for pid in self.children:
+            os.kill(pid, signal.SIGTERM)
+        for process, _ in self.children.values():
+            process.join()
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Run RQ worker with specified queues")
     parser.add_argument(
         "queues",
         nargs="*",
         default=list(QUEUE.keys()),
-        help="Queue names to process (space-separated)",
+        help="Queue names to process (space-separated), in priority order; "
+        "with --processes a queue may be weighted as name:weight",
+    )
+    parser.add_argument(
+        "--async",
+        dest="use_async",
+        action="store_true",
+        help="Run jobs concurrently on an event loop with pooled SMTP connections",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=settings.EMAIL_WORKER_CONCURRENCY,
+        help="Maximum concurrent jobs in --async mode",
+    )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        help="Supervise a pool of at least this many worker processes",
+    )
+    parser.add_argument(
+        "--max",
+        type=int,
+        help="Maximum worker processes when scaling on queue depth",
+    )
+    parser.add_argument(
+        "--jobs-per-worker",
+        type=int,
+        default=20,
+        help="Queued jobs per worker before scaling up",
+    )
+    parser.add_argument(
+        "--max-job-age",
+        type=float,
+        default=10.0,
+        help="Scale up while the oldest queued job waits longer (seconds)",
     )
 
     args = parser.parse_args()
-    start_worker(args.queues)
+    weights = parse_weighted_queues(args.queues)
+    if args.processes:
+        WorkerSupervisor(
+            weights,
+            min_workers=args.processes,
+            max_workers=args.max or args.processes,
+            use_async=args.use_async,
+            concurrency=args.concurrency,
+            jobs_per_worker=args.jobs_per_worker,
+            max_job_age=args.max_job_age,
+        ).run()
+    elif args.use_async:
+        # A single worker has no shares to split, so weights are ignored
+        asyncio.run(run_async_worker(list(weights), args.concurrency))
+    else:
+        start_worker(list(weights))